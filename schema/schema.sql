@@ -2,6 +2,9 @@
 -- PostgreSQL/Supabase DDL for sound equipment rental management
 -- This schema supports multiple related tables as required by the Cloud Database module
 
+-- btree_gist lets a GiST index cover a plain column (package_id) alongside a range
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
 -- Table: packages
 -- Stores rental packages (Basic, Standard, Premium, etc.)
 CREATE TABLE packages (
@@ -57,12 +60,374 @@ CREATE TABLE bookings (
     total_price NUMERIC(12,2) NOT NULL,
     status TEXT NOT NULL DEFAULT 'pending',
     created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    -- Inclusive rental period as a range, so overlap checks can use && and a GiST index
+    rental_range DATERANGE GENERATED ALWAYS AS (daterange(start_date, end_date, '[]')) STORED,
     CONSTRAINT valid_date_range CHECK (end_date >= start_date),
     CONSTRAINT positive_qty CHECK (qty > 0)
 );
 
 -- Indexes for performance optimization
--- Critical for availability queries that filter by package and date ranges
-CREATE INDEX idx_bookings_package_dates ON bookings(package_id, start_date, end_date);
+-- Critical for availability queries: every overlap check is "package_id = ? AND
+-- rental_range && ?", which this GiST index answers directly.
+-- Partial: availability never looks at cancelled bookings, so they stay out of the index.
+CREATE INDEX idx_bookings_package_range ON bookings USING GIST (package_id, rental_range)
+    WHERE status <> 'cancelled';
+-- Plain index over every booking (cancelled ones included) for the
+-- ON DELETE RESTRICT check when a package is deleted - the partial GiST
+-- index above can't answer "does any booking reference this package".
+CREATE INDEX idx_bookings_package ON bookings(package_id);
 CREATE INDEX idx_package_gear_package ON package_gear(package_id);
-CREATE INDEX idx_bookings_status ON bookings(status);
\ No newline at end of file
+-- Booking listings are newest first, one page at a time: with these the
+-- planner reads the first page straight off the index and stops, no sort.
+-- The (status, created_at) one serves status-filtered pages and plain
+-- status lookups alike.
+CREATE INDEX idx_bookings_created_at ON bookings(created_at DESC);
+CREATE INDEX idx_bookings_status ON bookings(status, created_at DESC);
+
+-- ============================================================================
+-- VIEWS
+-- ============================================================================
+
+-- Materialized view: packages_with_gear
+-- Every package with its gear flattened into a gear_items JSON array, so
+-- listing packages is one scan with no joins. Statement triggers on
+-- packages, package_gear and gear refresh it in the same transaction as
+-- the change (see refresh_packages_with_gear below).
+CREATE MATERIALIZED VIEW packages_with_gear AS
+SELECT
+    p.*,
+    COALESCE(
+        jsonb_agg(
+            jsonb_build_object('qty', pg.qty, 'notes', pg.notes, 'gear', to_jsonb(g))
+            ORDER BY pg.id
+        ) FILTER (WHERE pg.id IS NOT NULL),
+        '[]'::jsonb
+    ) AS gear_items
+FROM packages p
+LEFT JOIN package_gear pg ON pg.package_id = p.id
+LEFT JOIN gear g ON g.id = pg.gear_id
+GROUP BY p.id;
+
+-- REFRESH ... CONCURRENTLY needs a unique index on the view
+CREATE UNIQUE INDEX idx_packages_with_gear_id ON packages_with_gear(id);
+CREATE INDEX idx_packages_with_gear_rate ON packages_with_gear(daily_rate);
+
+-- View: bookings_with_package
+-- Bookings with their package name joined on, for the booking listings.
+-- A plain LEFT JOIN lets Postgres apply ORDER BY/LIMIT first and look up
+-- only the names it needs, instead of PostgREST's per-row embed subquery.
+-- security_invoker (Postgres 15+) makes the view read bookings with the
+-- caller's rights, so RLS on bookings still applies - a plain view would
+-- run as its owner and hand every customer's contact details to the API.
+CREATE VIEW bookings_with_package WITH (security_invoker = on) AS
+SELECT b.*, p.name AS package_name
+FROM bookings b
+LEFT JOIN packages p ON p.id = b.package_id;
+
+
+-- ============================================================================
+-- FUNCTIONS (called from the app via client.rpc)
+-- ============================================================================
+
+-- Function: create_booking_checked
+-- Checks availability, prices and inserts a booking in a single round-trip.
+-- Takes the package's booking lock (same one as book_if_available) so two
+-- concurrent bookings for the same package can't both grab the last unit
+-- between check and insert.
+-- Returns {ok, detail, booking, breakdown} or {ok: false, detail}.
+-- (Not "message": postgrest-py treats any JSON object with a message key
+-- as an API error and raises, even on success.)
+CREATE OR REPLACE FUNCTION create_booking_checked(
+    p_package_id BIGINT,
+    p_start DATE,
+    p_end DATE,
+    p_qty INTEGER,
+    p_include_dj BOOLEAN,
+    p_name TEXT,
+    p_phone TEXT,
+    p_email TEXT
+) RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_package packages%ROWTYPE;
+    v_booked INTEGER;
+    v_remaining INTEGER;
+    v_days INTEGER;
+    v_dj_rate NUMERIC(12,2) := 0;
+    v_base_price NUMERIC(12,2);
+    v_dj_price NUMERIC(12,2) := 0;
+    v_booking bookings%ROWTYPE;
+BEGIN
+    -- Per-package advisory lock, held until the transaction ends. Bookings
+    -- for other packages don't wait, and the packages row itself stays
+    -- unlocked, so editing a package doesn't queue behind bookings.
+    PERFORM pg_advisory_xact_lock(hashtext('pkg:' || p_package_id));
+
+    SELECT * INTO v_package FROM packages WHERE id = p_package_id;
+
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('ok', FALSE, 'detail', format('Package %s not found', p_package_id));
+    END IF;
+
+    IF p_qty > v_package.stock THEN
+        RETURN jsonb_build_object('ok', FALSE, 'detail', format(
+            'Requested quantity (%s) exceeds total stock (%s) for %s',
+            p_qty, v_package.stock, v_package.name
+        ));
+    END IF;
+
+    -- Bookings overlap when their inclusive date ranges share a day
+    SELECT COALESCE(SUM(qty), 0) INTO v_booked
+    FROM bookings
+    WHERE package_id = p_package_id
+      AND status <> 'cancelled'
+      AND rental_range && daterange(p_start, p_end, '[]');
+
+    v_remaining := v_package.stock - v_booked;
+
+    IF p_qty > v_remaining THEN
+        RETURN jsonb_build_object('ok', FALSE, 'detail', format(
+            'Not enough %s available. You need: %s, We have: %s (already booked: %s/%s)',
+            v_package.name, p_qty, v_remaining, v_booked, v_package.stock
+        ));
+    END IF;
+
+    -- Both start and end dates count as rental days
+    v_days := GREATEST(1, p_end - p_start + 1);
+    v_base_price := v_package.daily_rate * v_days * p_qty;
+
+    IF p_include_dj THEN
+        SELECT dj_daily_rate INTO v_dj_rate FROM settings WHERE id = 1;
+        v_dj_rate := COALESCE(v_dj_rate, 150.00);
+        v_dj_price := v_dj_rate * v_days * p_qty;
+    END IF;
+
+    INSERT INTO bookings (
+        package_id, customer_name, phone, email, start_date, end_date,
+        qty, include_dj, total_price, status
+    ) VALUES (
+        p_package_id, p_name, p_phone, p_email, p_start, p_end,
+        p_qty, p_include_dj, v_base_price + v_dj_price, 'pending'
+    )
+    RETURNING * INTO v_booking;
+
+    RETURN jsonb_build_object(
+        'ok', TRUE,
+        'detail', format(
+            '%s is available (%s of %s free for these dates)',
+            v_package.name, v_remaining, v_package.stock
+        ),
+        'booking', to_jsonb(v_booking),
+        'breakdown', jsonb_build_object(
+            'days', v_days,
+            'daily_rate', v_package.daily_rate,
+            'qty', p_qty,
+            'base_price', v_base_price,
+            'dj_rate', v_dj_rate,
+            'dj_price', v_dj_price,
+            'total', v_base_price + v_dj_price
+        )
+    );
+END;
+$$;
+
+
+-- Function: book_if_available
+-- Plain "check then insert" for callers that already priced the booking
+-- (see models.create_booking_checked). Takes the package's booking lock so
+-- concurrent bookings queue up, re-counts what's booked, and either inserts
+-- and returns the new row or raises - no gap between check and insert.
+CREATE OR REPLACE FUNCTION book_if_available(
+    p_package_id BIGINT,
+    p_start DATE,
+    p_end DATE,
+    p_qty INTEGER,
+    p_include_dj BOOLEAN,
+    p_total_price NUMERIC,
+    p_name TEXT,
+    p_phone TEXT,
+    p_email TEXT
+) RETURNS bookings
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_stock INTEGER;
+    v_booked INTEGER;
+    v_booking bookings%ROWTYPE;
+BEGIN
+    -- Locking the package (not the overlapping bookings) also blocks bookings
+    -- that don't exist yet, which row locks on bookings couldn't do.
+    -- See create_booking_checked for why it's an advisory lock.
+    PERFORM pg_advisory_xact_lock(hashtext('pkg:' || p_package_id));
+
+    SELECT stock INTO v_stock FROM packages WHERE id = p_package_id;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Package % not found', p_package_id;
+    END IF;
+
+    SELECT COALESCE(SUM(qty), 0) INTO v_booked
+    FROM bookings
+    WHERE package_id = p_package_id
+      AND status <> 'cancelled'
+      AND rental_range && daterange(p_start, p_end, '[]');
+
+    IF p_qty > v_stock - v_booked THEN
+        RAISE EXCEPTION 'Not enough stock for package %: need %, only % free',
+            p_package_id, p_qty, v_stock - v_booked;
+    END IF;
+
+    INSERT INTO bookings (
+        package_id, customer_name, phone, email, start_date, end_date,
+        qty, include_dj, total_price, status
+    ) VALUES (
+        p_package_id, p_name, p_phone, p_email, p_start, p_end,
+        p_qty, p_include_dj, p_total_price, 'pending'
+    )
+    RETURNING * INTO v_booking;
+
+    RETURN v_booking;
+END;
+$$;
+
+
+-- Function: available_qty
+-- How many of a package are still free over a date range: stock minus
+-- everything already booked. Returns one integer instead of shipping every
+-- overlapping booking to the app just to add up their quantities.
+CREATE OR REPLACE FUNCTION available_qty(p BIGINT, s DATE, e DATE)
+RETURNS INTEGER
+LANGUAGE sql STABLE
+AS $$
+    SELECT (
+        (SELECT stock FROM packages WHERE id = p)
+        - COALESCE((
+            SELECT SUM(qty)
+            FROM bookings
+            WHERE package_id = p
+              AND status <> 'cancelled'
+              AND rental_range && daterange(s, e, '[]')
+        ), 0)
+    )::INTEGER;
+$$;
+
+
+-- Function: booked_qty_map
+-- Total quantity already booked per package over a date window.
+-- One grouped query instead of an overlap query per package, for
+-- callers that need availability for every package at once.
+CREATE OR REPLACE FUNCTION booked_qty_map(s DATE, e DATE)
+RETURNS TABLE (package_id BIGINT, booked_qty BIGINT)
+LANGUAGE sql STABLE
+AS $$
+    SELECT b.package_id, COALESCE(SUM(b.qty), 0)
+    FROM bookings b
+    WHERE b.rental_range && daterange(s, e, '[]')
+      AND b.status <> 'cancelled'
+    GROUP BY b.package_id;
+$$;
+
+
+-- Function: bookings_overlapping
+-- Non-cancelled bookings for one package that overlap a date range.
+-- Returns only the columns an availability check needs, so callers don't
+-- have to ask PostgREST for a column list. A single-SELECT SQL function
+-- marked STABLE gets inlined into the query that calls it, so any extra
+-- filters are planned together with the overlap filter as one query
+-- (plpgsql would run it as a separate black box).
+CREATE OR REPLACE FUNCTION bookings_overlapping(p BIGINT, s DATE, e DATE)
+RETURNS TABLE (id BIGINT, start_date DATE, end_date DATE, qty INTEGER)
+LANGUAGE sql STABLE
+AS $$
+    SELECT b.id, b.start_date, b.end_date, b.qty
+    FROM bookings b
+    WHERE b.package_id = p
+      AND b.status <> 'cancelled'
+      AND b.rental_range && daterange(s, e, '[]');
+$$;
+
+
+-- Function: refresh_packages_with_gear
+-- Rebuilds the packages_with_gear view without blocking readers.
+-- SECURITY DEFINER so it runs as the view's owner whoever made the change.
+-- search_path is pinned so a caller can't shadow packages_with_gear with
+-- their own object. The triggers below call it; calling it directly is
+-- left to the writing roles - an anonymous key hammering a full rebuild
+-- would be an easy way to load the database.
+CREATE OR REPLACE FUNCTION refresh_packages_with_gear()
+RETURNS VOID
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $$
+BEGIN
+    REFRESH MATERIALIZED VIEW CONCURRENTLY packages_with_gear;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION refresh_packages_with_gear() FROM anon, public;
+GRANT EXECUTE ON FUNCTION refresh_packages_with_gear() TO authenticated, service_role;
+
+
+-- Trigger function: refresh_packages_with_gear_trigger
+-- Keeps packages_with_gear current after any change to what it's built
+-- from. Once per statement (not per row), inside the writing transaction,
+-- so a package write and its listing refresh succeed or fail together and
+-- the app never has to make a separate refresh call. Trigger functions
+-- run no matter who fired them, so the anon key's writes refresh it too.
+CREATE OR REPLACE FUNCTION refresh_packages_with_gear_trigger()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $$
+BEGIN
+    PERFORM refresh_packages_with_gear();
+    RETURN NULL;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION refresh_packages_with_gear_trigger() FROM anon, public;
+
+CREATE TRIGGER packages_refresh_listing
+    AFTER INSERT OR UPDATE OR DELETE ON packages
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_packages_with_gear_trigger();
+CREATE TRIGGER package_gear_refresh_listing
+    AFTER INSERT OR UPDATE OR DELETE ON package_gear
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_packages_with_gear_trigger();
+-- New gear isn't in any package yet, so only edits and deletes matter
+CREATE TRIGGER gear_refresh_listing
+    AFTER UPDATE OR DELETE ON gear
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_packages_with_gear_trigger();
+
+
+-- Function: create_package_with_items
+-- Inserts a package and all of its package_gear rows in one transaction.
+-- p_items is a JSON array of {gear_id, qty, notes}; the gear rows go in as
+-- a single INSERT ... SELECT, and if any of them fail the package is rolled
+-- back too, so there are never half-created packages.
+CREATE OR REPLACE FUNCTION create_package_with_items(
+    p_name TEXT,
+    p_description TEXT,
+    p_daily_rate NUMERIC,
+    p_stock INTEGER,
+    p_items JSONB
+) RETURNS packages
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_package packages%ROWTYPE;
+BEGIN
+    INSERT INTO packages (name, description, daily_rate, stock)
+    VALUES (p_name, p_description, p_daily_rate, p_stock)
+    RETURNING * INTO v_package;
+
+    INSERT INTO package_gear (package_id, gear_id, qty, notes)
+    SELECT v_package.id, item.gear_id, item.qty, item.notes
+    FROM jsonb_to_recordset(COALESCE(p_items, '[]'::jsonb))
+        AS item(gear_id BIGINT, qty INTEGER, notes TEXT);
+
+    RETURN v_package;
+END;
+$$;
@@ -112,4 +112,7 @@ INSERT INTO bookings (package_id, customer_name, phone, email, start_date, end_d
         500.00,  -- 1 day * ($350 + $150 DJ) * 1 qty
         'pending'
     );
-    
\ No newline at end of file
+    
+
+-- Pick up the seeded packages and gear in the listing view
+REFRESH MATERIALIZED VIEW packages_with_gear;
@@ -5,24 +5,90 @@ Handles the important stuff:
 - Figuring out if a package is available for certain dates
 - Calculating total prices (equipment + optional DJ service)
 - Working out how many rental days we're dealing with
+- Building a day-by-day availability calendar for every package
+- Keeping a per-package occupancy calendar in memory for quick lookups
+- An async quote that runs its lookups side by side
 """
 
-from datetime import datetime, date
-from typing import Optional
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from decimal import Decimal
+from operator import attrgetter, itemgetter
+from typing import Any, Dict, List, Optional, Tuple
+from postgrest import AsyncPostgrestClient
 from supabase import Client
-from .models import get_bookings_for_package, get_dj_rate
-from .db import get_supabase_client
+from .models import (
+    DateLike,
+    _to_date,
+    aget_bookings_for_package,
+    aget_dj_rate_cents,
+    from_cents,
+    get_available_qty,
+    get_bookings_for_package,
+    get_bookings_in_range,
+    get_dj_rate_cents,
+    invalidate_dj_rate,
+    list_packages,
+    on_change,
+    to_cents
+)
+from .db import get_async_postgrest_client, get_supabase_client
 
+# availability_kernel is imported inside the functions that use it, so
+# commands that never price or build a calendar don't pay for loading Numba
 
-def calculate_rental_days(start_date: str, end_date: str) -> int:
+
+# How long looked-up package rows stay fresh (seconds). They rarely
+# change, so there's no point re-fetching them on every quote.
+# (The DJ rate has its own cache in models.get_dj_rate_cents.)
+CACHE_TTL = 60.0
+
+# (table, id) -> (value, expires_at)
+_cache: Dict[Tuple[str, int], Tuple[Any, float]] = {}
+
+
+def _cache_get(key: Tuple[str, int]) -> Optional[Any]:
+    """Returns a cached value, or None if it's missing or expired."""
+    entry = _cache.get(key)
+    if entry is None:
+        return None
+    
+    value, expires_at = entry
+    if time.monotonic() >= expires_at:
+        del _cache[key]
+        return None
+    
+    return value
+
+
+def _cache_set(key: Tuple[str, int], value: Any) -> None:
+    """Stores a value for CACHE_TTL seconds."""
+    _cache[key] = (value, time.monotonic() + CACHE_TTL)
+
+
+def invalidate_cache() -> None:
+    """
+    Forgets all cached package rows, the DJ rate and occupancy windows.
+    
+    Call this after changing packages or settings (tests use it too) so
+    the next lookup goes back to the database.
+    """
+    _cache.clear()
+    invalidate_dj_rate()
+    occupancy.invalidate()
+
+
+def calculate_rental_days(start_date: DateLike, end_date: DateLike) -> int:
     """
     Counts rental days - includes both start and end dates.
     
     So Nov 10 to Nov 12 = 3 days (the 10th, 11th, and 12th)
     
     Args:
-        start_date: Start date (YYYY-MM-DD)
-        end_date: End date (YYYY-MM-DD)
+        start_date: Start date (YYYY-MM-DD or a date)
+        end_date: End date (YYYY-MM-DD or a date)
         
     Returns:
         Number of days (at least 1)
@@ -31,9 +97,12 @@ def calculate_rental_days(start_date: str, end_date: str) -> int:
         calculate_rental_days("2025-11-10", "2025-11-12") → 3 days
         calculate_rental_days("2025-11-10", "2025-11-10") → 1 day
     """
-    # Convert strings to actual dates
-    start = datetime.strptime(start_date, "%Y-%m-%d").date()
-    end = datetime.strptime(end_date, "%Y-%m-%d").date()
+    # Same-day hire - nothing to parse
+    if start_date == end_date:
+        return 1
+    
+    start = _to_date(start_date)
+    end = _to_date(end_date)
     
     # Add 1 because we include both endpoints
     days = (end - start).days + 1
@@ -42,31 +111,109 @@ def calculate_rental_days(start_date: str, end_date: str) -> int:
     return max(1, days)
 
 
+def fetch_package(package_id: int, client: Optional[Client] = None) -> Optional[Dict[str, Any]]:
+    """
+    Grabs everything pricing and availability need about a package in one go.
+    
+    Pass the result into is_package_available() and calculate_total_price()
+    so a booking flow only hits the packages table once. Rows are cached
+    for CACHE_TTL seconds, so repeat lookups don't hit it at all.
+    
+    Args:
+        package_id: Which package to look up
+        client: Supabase client (optional)
+        
+    Returns:
+        Dict with id, name, stock, daily_rate - or None if there's no such package
+    """
+    cached = _cache_get(("packages", package_id))
+    if cached is not None:
+        return cached
+    
+    if client is None:
+        client = get_supabase_client()
+    
+    response = (
+        client.table("packages")
+        .select("id,name,stock,daily_rate")
+        .eq("id", package_id)
+        .maybe_single()
+        .execute()
+    )
+    
+    package = response.data if response else None
+    
+    # Only cache hits - a missing package might get created any moment
+    if package:
+        _cache_set(("packages", package_id), package)
+    
+    return package
+
+
+async def afetch_package(package_id: int, client: Optional[AsyncPostgrestClient] = None) -> Optional[Dict[str, Any]]:
+    """
+    Async version of fetch_package() - shares the same cache.
+    
+    Args:
+        package_id: Which package to look up
+        client: Async PostgREST client (optional, uses the shared one)
+        
+    Returns:
+        Dict with id, name, stock, daily_rate - or None if there's no such package
+    """
+    cached = _cache_get(("packages", package_id))
+    if cached is not None:
+        return cached
+    
+    if client is None:
+        client = get_async_postgrest_client()
+    
+    response = await (
+        client.table("packages")
+        .select("id,name,stock,daily_rate")
+        .eq("id", package_id)
+        .maybe_single()
+        .execute()
+    )
+    
+    package = response.data if response else None
+    
+    if package:
+        _cache_set(("packages", package_id), package)
+    
+    return package
+
+
 def is_package_available(
     package_id: int,
-    start_date: str,
-    end_date: str,
+    start_date: DateLike,
+    end_date: DateLike,
     qty: int,
-    client: Optional[Client] = None
+    client: Optional[Client] = None,
+    package: Optional[Dict[str, Any]] = None,
+    booked: Optional[Dict[int, int]] = None
 ) -> tuple[bool, str]:
     """
     Checks if we have enough packages available for the requested dates.
     
     Here's what we do:
     1. Look up how many of this package we have in stock
-    2. Find all bookings that overlap with the requested dates
-    3. Add up how many are already booked during that time
-    4. See if we have enough left over
+    2. Ask the database how many are left once overlapping bookings
+       are taken out (one number back, not every booking row)
+    3. See if we have enough left over
     
     Bookings overlap when:
         requested_start <= their_end AND requested_end >= their_start
     
     Args:
         package_id: Which package to check
-        start_date: When they want to start (YYYY-MM-DD)
-        end_date: When they're done (YYYY-MM-DD)
+        start_date: When they want to start (YYYY-MM-DD or a date)
+        end_date: When they're done (YYYY-MM-DD or a date)
         qty: How many they need
         client: Supabase client (optional)
+        package: Row from fetch_package() (optional - saves a lookup)
+        booked: Map from models.booked_qty_by_package() for the same dates
+                (optional - lets bulk callers skip the overlap query)
         
     Returns:
         (available?, message explaining why or why not)
@@ -78,16 +225,17 @@ def is_package_available(
         else:
             print(f"Sorry: {msg}")
     """
-    if client is None:
+    # With both package and booked passed in there's nothing to look up
+    if client is None and (package is None or booked is None):
         client = get_supabase_client()
     
-    # Look up the package
-    pkg_response = client.table("packages").select("name, stock").eq("id", package_id).execute()
+    # Look up the package (unless the caller already did)
+    if package is None:
+        package = fetch_package(package_id, client)
     
-    if not pkg_response.data:
+    if not package:
         return False, f"Package {package_id} not found"
     
-    package = pkg_response.data[0]
     stock = package["stock"]
     package_name = package["name"]
     
@@ -95,14 +243,15 @@ def is_package_available(
     if qty > stock:
         return False, f"Requested quantity ({qty}) exceeds total stock ({stock}) for {package_name}"
     
-    # Find bookings that clash with these dates
-    overlapping_bookings = get_bookings_for_package(package_id, start_date, end_date, client)
-    
     # See how many are already spoken for
-    booked_qty = sum(booking["qty"] for booking in overlapping_bookings)
-    
-    # What's left?
-    remaining = stock - booked_qty
+    if booked is not None:
+        booked_qty = booked.get(package_id, 0)
+        remaining = stock - booked_qty
+    else:
+        remaining = get_available_qty(package_id, start_date, end_date, client)
+        if remaining is None:
+            return False, f"Package {package_id} not found"
+        booked_qty = stock - remaining
     
     if qty > remaining:
         return False, (
@@ -117,12 +266,13 @@ def is_package_available(
 
 def calculate_total_price(
     package_id: int,
-    start_date: str,
-    end_date: str,
+    start_date: DateLike,
+    end_date: DateLike,
     qty: int,
     include_dj: bool,
-    client: Optional[Client] = None
-) -> tuple[float, dict]:
+    client: Optional[Client] = None,
+    package: Optional[Dict[str, Any]] = None
+) -> tuple[Decimal, dict]:
     """
     Figures out how much a rental will cost.
     
@@ -131,13 +281,17 @@ def calculate_total_price(
     - DJ service (optional): dj_rate × days × quantity
     - Total: equipment + DJ (if added)
     
+    The math is done in whole cents, so there's no float rounding - the
+    money in the breakdown comes back as exact Decimals.
+    
     Args:
         package_id: Which package they're renting
-        start_date: Start date (YYYY-MM-DD)
-        end_date: End date (YYYY-MM-DD)
+        start_date: Start date (YYYY-MM-DD or a date)
+        end_date: End date (YYYY-MM-DD or a date)
         qty: How many packages
         include_dj: Add DJ service?
         client: Supabase client (optional)
+        package: Row from fetch_package() (optional - saves a lookup)
         
     Returns:
         (total_price, detailed_breakdown_dict)
@@ -145,6 +299,7 @@ def calculate_total_price(
         Breakdown includes:
             days, daily_rate, qty, base_price,
             dj_rate, dj_price, total
+            total_cents (ready for models.create_booking)
             
     Example:
         total, breakdown = calculate_total_price(1, "2025-11-10", "2025-11-12", 1, True)
@@ -153,41 +308,399 @@ def calculate_total_price(
     if client is None:
         client = get_supabase_client()
     
-    # Get the package rate
-    pkg_response = client.table("packages").select("daily_rate").eq("id", package_id).execute()
+    # Get the package rate (unless the caller already did)
+    if package is None:
+        package = fetch_package(package_id, client)
     
-    if not pkg_response.data:
+    if not package:
         raise ValueError(f"Package {package_id} not found")
     
-    daily_rate = float(pkg_response.data[0]["daily_rate"])
+    # DJ rate only matters if they want a DJ
+    dj_rate = get_dj_rate_cents(client) if include_dj else 0
+    
+    breakdown = _price_breakdown(package, start_date, end_date, qty, include_dj, dj_rate)
+    
+    return breakdown["total"], breakdown
+
+
+def _price_breakdown(
+    package: Dict[str, Any],
+    start_date: DateLike,
+    end_date: DateLike,
+    qty: int,
+    include_dj: bool,
+    dj_rate: int
+) -> Dict[str, Any]:
+    """
+    The pricing math behind calculate_total_price(), once the package row
+    and DJ rate (in cents) have been looked up.
+    """
+    from .availability_kernel import compute_price
+    
+    daily_rate = to_cents(package["daily_rate"])
     
     # How many days?
     days = calculate_rental_days(start_date, end_date)
     
-    # Base equipment cost
-    base_price = daily_rate * days * qty
+    # The arithmetic itself runs in the (possibly compiled) pricing kernel
+    base_price, dj_price = compute_price(daily_rate, dj_rate, days, qty, include_dj)
+    total = int(base_price + dj_price)
     
-    # Start building the breakdown
-    breakdown = {
+    return {
         "days": days,
-        "daily_rate": daily_rate,
+        "daily_rate": from_cents(daily_rate),
         "qty": qty,
-        "base_price": base_price,
-        "dj_rate": 0.0,
-        "dj_price": 0.0,
-        "total": base_price
+        "base_price": from_cents(int(base_price)),
+        "dj_rate": from_cents(dj_rate),
+        "dj_price": from_cents(int(dj_price)),
+        "total": from_cents(total),
+        "total_cents": total
     }
+
+
+def book_package(
+    package_id: int,
+    start_date: DateLike,
+    end_date: DateLike,
+    qty: int,
+    include_dj: bool,
+    customer_name: str,
+    phone: str,
+    email: str,
+    client: Optional[Client] = None
+) -> Dict[str, Any]:
+    """
+    Checks availability, prices and saves a booking in one database call.
     
-    # Tack on DJ cost if they want it
+    Runs the create_booking_checked() Postgres function, which does the
+    same checks as is_package_available() and calculate_total_price() but
+    inside a single transaction - one round-trip, and no gap between
+    "is it free?" and "book it" for another booking to sneak into.
+    
+    Args:
+        package_id: Which package they're renting
+        start_date: Start date (YYYY-MM-DD or a date)
+        end_date: End date (YYYY-MM-DD or a date)
+        qty: How many packages
+        include_dj: Add DJ service?
+        customer_name: Customer's full name
+        phone: Contact phone number
+        email: Contact email address
+        client: Supabase client (optional)
+        
+    Returns:
+        Dict with:
+            ok: Whether the booking was made
+            detail: Availability message (or why it failed)
+            booking: The created booking (only when ok)
+            breakdown: Same shape as calculate_total_price() (only when ok)
+    """
+    if client is None:
+        client = get_supabase_client()
+    
+    response = client.rpc(
+        "create_booking_checked",
+        {
+            "p_package_id": package_id,
+            "p_start": str(start_date),  # str() turns date objects into YYYY-MM-DD
+            "p_end": str(end_date),
+            "p_qty": qty,
+            "p_include_dj": include_dj,
+            "p_name": customer_name,
+            "p_phone": phone,
+            "p_email": email
+        }
+    ).execute()
+    
+    result = response.data
+    
+    if result.get("ok"):
+        occupancy.invalidate(package_id)
+        
+        # Money comes back as JSON numbers - make it exact Decimals like calculate_total_price()
+        breakdown = result["breakdown"]
+        for key in ("daily_rate", "base_price", "dj_rate", "dj_price", "total"):
+            breakdown[key] = from_cents(to_cents(breakdown[key]))
+        breakdown["total_cents"] = to_cents(breakdown["total"])
+    
+    return result
+
+
+async def aquote(
+    package_id: int,
+    start_date: DateLike,
+    end_date: DateLike,
+    qty: int,
+    include_dj: bool,
+    client: Optional[AsyncPostgrestClient] = None
+) -> Dict[str, Any]:
+    """
+    Checks availability and prices a rental without booking it - async.
+    
+    The package row, the overlapping bookings and the DJ rate don't depend
+    on each other, so they're fetched at the same time with asyncio.gather:
+    the wait is the slowest of the three lookups, not all of them added up.
+    
+    Args:
+        package_id: Which package they're renting
+        start_date: Start date (YYYY-MM-DD or a date)
+        end_date: End date (YYYY-MM-DD or a date)
+        qty: How many packages
+        include_dj: Add DJ service?
+        client: Async PostgREST client (optional, uses the shared one)
+        
+    Returns:
+        Dict with:
+            ok: Whether it's available
+            detail: Availability message (or why not)
+            breakdown: Same shape as calculate_total_price() (only when ok)
+            
+    Example:
+        quote = run_async(aquote(1, "2025-11-10", "2025-11-12", 1, True))
+    """
+    if client is None:
+        client = get_async_postgrest_client()
+    
+    lookups = [
+        afetch_package(package_id, client),
+        aget_bookings_for_package(package_id, start_date, end_date, client=client)
+    ]
     if include_dj:
-        dj_rate = get_dj_rate(client)
-        dj_price = dj_rate * days * qty
+        lookups.append(aget_dj_rate_cents(client))
+    
+    package, overlapping, *dj_rate = await asyncio.gather(*lookups)
+    
+    if not package:
+        return {"ok": False, "detail": f"Package {package_id} not found"}
+    
+    booked = {package_id: sum(map(attrgetter("qty"), overlapping))}
+    available, message = is_package_available(
+        package_id, start_date, end_date, qty, package=package, booked=booked
+    )
+    
+    if not available:
+        return {"ok": False, "detail": message}
+    
+    breakdown = _price_breakdown(package, start_date, end_date, qty, include_dj, dj_rate[0] if dj_rate else 0)
+    
+    return {"ok": True, "detail": message, "breakdown": breakdown}
+
+
+# Pulls the columns the calendar kernel needs out of a booking row in one call
+_BOOKING_COLUMNS = itemgetter("package_id", "start_date", "end_date", "qty")
+
+# Same for Booking objects (dates already parsed)
+_BOOKING_SPAN = attrgetter("start_date", "end_date", "qty")
+
+
+def calendar(
+    start_date: DateLike,
+    end_date: DateLike,
+    client: Optional[Client] = None
+) -> Tuple[List[Dict[str, Any]], List[date], Any]:
+    """
+    Works out how many of every package are free on every day in a range.
+    
+    Two queries (packages + overlapping bookings), then the day-by-day
+    math runs in availability_kernel - compiled with Numba when it's
+    installed, plain Python otherwise.
+    
+    Args:
+        start_date: First day of the calendar (YYYY-MM-DD or a date)
+        end_date: Last day of the calendar (YYYY-MM-DD or a date)
+        client: Supabase client (optional)
+        
+    Returns:
+        (packages, days, free) where free[i][d] is how many of packages[i]
+        are free on days[d]
         
-        breakdown["dj_rate"] = dj_rate
-        breakdown["dj_price"] = dj_price
-        breakdown["total"] = base_price + dj_price
+    Example:
+        packages, days, free = calendar("2025-11-01", "2025-11-30")
+        print(f"{packages[0]['name']} free on {days[14]}: {free[0][14]}")
+    """
+    from .availability_kernel import free_qty_matrix, to_int_array
     
-    return breakdown["total"], breakdown
+    if client is None:
+        client = get_supabase_client()
+    
+    start = _to_date(start_date)
+    end = _to_date(end_date)
+    
+    packages = list_packages(client)
+    bookings = get_bookings_in_range(start.isoformat(), end.isoformat(), client)
+    
+    # Turn everything into flat integer columns for the kernel.
+    # map() + itemgetter keeps these loops in C - no Python frame per row -
+    # and zip(*...) splits the bookings into columns in a single pass.
+    row_for_package = {pkg_id: row for row, pkg_id in enumerate(map(itemgetter("id"), packages))}
+    stock = to_int_array(map(itemgetter("stock"), packages))
+    pkg_ids, starts, ends, qtys = zip(*map(_BOOKING_COLUMNS, bookings)) if bookings else ((), (), (), ())
+    booking_pkg = to_int_array(map(row_for_package.__getitem__, pkg_ids))
+    booking_start = to_int_array(map(date.toordinal, map(date.fromisoformat, starts)))
+    booking_end = to_int_array(map(date.toordinal, map(date.fromisoformat, ends)))
+    booking_qty = to_int_array(qtys)
+    
+    free = free_qty_matrix(
+        stock,
+        booking_pkg,
+        booking_start,
+        booking_end,
+        booking_qty,
+        start.toordinal(),
+        end.toordinal()
+    )
+    
+    days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    
+    return packages, days, free
+
+
+class OccupancyCalendar:
+    """
+    Remembers how many of a package are free on each day of a date window.
+    
+    The first lookup for a package loads a whole window (window_days days)
+    with one query and works out free stock per day using the calendar
+    kernel. After that, lookups inside the window are just an index into
+    that row until it goes stale (ttl seconds) or gets invalidated.
+    
+    Only the most recently used max_windows windows are kept.
+    
+    Example:
+        free = occupancy.free_on(1, "2025-11-14")
+    """
+    
+    def __init__(self, window_days: int = 180, ttl: float = CACHE_TTL, max_windows: int = 256):
+        self.window_days = window_days
+        self.ttl = ttl
+        self.max_windows = max_windows
+        
+        # (package_id, window start ordinal) -> (free per day, expires_at)
+        self._windows: "OrderedDict[Tuple[int, int], Tuple[Any, float]]" = OrderedDict()
+    
+    def load(
+        self,
+        package_id: int,
+        window_start: Optional[DateLike] = None,
+        client: Optional[Client] = None
+    ) -> Optional[Any]:
+        """
+        Gets free stock per day for window_days days from window_start.
+        
+        Args:
+            package_id: Package to look at
+            window_start: First day of the window (defaults to today)
+            client: Supabase client (optional)
+            
+        Returns:
+            Free quantity per day (free[0] is window_start), or None if the
+            package doesn't exist
+        """
+        from .availability_kernel import free_qty_matrix, to_int_array
+        
+        start = date.today() if window_start is None else _to_date(window_start)
+        
+        key = (package_id, start.toordinal())
+        entry = self._windows.get(key)
+        if entry is not None:
+            free, expires_at = entry
+            if time.monotonic() < expires_at:
+                self._windows.move_to_end(key)
+                return free
+            del self._windows[key]
+        
+        if client is None:
+            client = get_supabase_client()
+        
+        package = fetch_package(package_id, client)
+        if package is None:
+            return None
+        
+        end = start + timedelta(days=self.window_days - 1)
+        bookings = get_bookings_for_package(package_id, start.isoformat(), end.isoformat(), client=client)
+        starts, ends, qtys = zip(*map(_BOOKING_SPAN, bookings)) if bookings else ((), (), ())
+        
+        # One package, so every booking maps to row 0
+        free = free_qty_matrix(
+            to_int_array([package["stock"]]),
+            to_int_array([0] * len(bookings)),
+            to_int_array(map(date.toordinal, starts)),
+            to_int_array(map(date.toordinal, ends)),
+            to_int_array(qtys),
+            start.toordinal(),
+            end.toordinal()
+        )[0]
+        
+        self._windows[key] = (free, time.monotonic() + self.ttl)
+        if len(self._windows) > self.max_windows:
+            self._windows.popitem(last=False)  # Least recently used
+        
+        return free
+    
+    def free_on(self, package_id: int, day: DateLike, client: Optional[Client] = None) -> Optional[int]:
+        """
+        How many of a package are free on one day.
+        
+        Days are grouped into fixed windows of window_days days (each
+        starting on a day ordinal divisible by window_days), so every day
+        in a window shares one cached load, whichever day came first.
+        
+        Args:
+            package_id: Package to look at
+            day: The day (YYYY-MM-DD or a date)
+            client: Supabase client (optional)
+            
+        Returns:
+            Free quantity, or None if the package doesn't exist
+        """
+        day = _to_date(day)
+        
+        ordinal = day.toordinal()
+        start = date.fromordinal(ordinal - ordinal % self.window_days)
+        
+        free = self.load(package_id, start, client)
+        if free is None:
+            return None
+        
+        return int(free[(day - start).days])
+    
+    def invalidate(self, package_id: Optional[int] = None) -> None:
+        """
+        Forgets cached windows for one package (or every package).
+        
+        Call this after a booking for the package is created or changes
+        status, so the next lookup sees it.
+        """
+        if package_id is None:
+            self._windows.clear()
+            return
+        
+        for key in [key for key in self._windows if key[0] == package_id]:
+            del self._windows[key]
+
+
+# Shared calendar - book_package(), invalidate_cache() and _forget_changed()
+# keep it up to date
+occupancy = OccupancyCalendar()
+
+
+def _forget_changed(table: str, package_id: int) -> None:
+    """
+    Drops what's cached about a package after models writes to it or
+    books it, so lookups don't have to wait out the TTL.
+    """
+    if table == "packages":
+        _cache.pop(("packages", package_id), None)
+    
+    # Stock changes and new bookings both change free quantities
+    occupancy.invalidate(package_id)
+
+
+on_change(_forget_changed)
+
+
+# Pulls every breakdown field out in one call
+_BREAKDOWN_FIELDS = itemgetter("days", "daily_rate", "qty", "base_price", "dj_rate", "dj_price", "total")
 
 
 def format_price_breakdown(breakdown: dict) -> str:
@@ -205,22 +718,17 @@ def format_price_breakdown(breakdown: dict) -> str:
         DJ Service: $150.00/day × 3 days × 1 qty = $450.00
         Total: $675.00
     """
-    lines = []
+    # Unpack once - the lines below then only touch locals
+    days, daily_rate, qty, base_price, dj_rate, dj_price, total = _BREAKDOWN_FIELDS(breakdown)
     
     # Equipment line
-    lines.append(
-        f"Equipment: ${breakdown['daily_rate']:.2f}/day × {breakdown['days']} days × "
-        f"{breakdown['qty']} qty = ${breakdown['base_price']:.2f}"
-    )
+    lines = [f"Equipment: ${daily_rate:.2f}/day × {days} days × {qty} qty = ${base_price:.2f}"]
     
     # DJ line if they added it
-    if breakdown['dj_price'] > 0:
-        lines.append(
-            f"DJ Service: ${breakdown['dj_rate']:.2f}/day × {breakdown['days']} days × "
-            f"{breakdown['qty']} qty = ${breakdown['dj_price']:.2f}"
-        )
+    if dj_price > 0:
+        lines.append(f"DJ Service: ${dj_rate:.2f}/day × {days} days × {qty} qty = ${dj_price:.2f}")
     
     # Bottom line
-    lines.append(f"Total: ${breakdown['total']:.2f}")
+    lines.append(f"Total: ${total:.2f}")
     
     return "\n".join(lines)
\ No newline at end of file
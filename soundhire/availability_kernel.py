@@ -0,0 +1,121 @@
+"""
+Number-crunching kernels for availability and pricing.
+
+The calendar is a packages × days × bookings loop of plain integer math,
+and pricing is a handful of multiplications that bulk quotes repeat over
+and over. When Numba is installed both get compiled to native code (the
+calendar spread across CPU cores). Without Numba we fall back to the same
+code in pure Python - slower, but the results are identical.
+
+Dates are passed in as ordinals (date.toordinal()) so the kernels only
+ever see integers.
+"""
+
+from typing import Any, Iterable, List
+
+try:
+    import numpy as np
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+
+def to_int_array(values: Iterable[int]) -> Any:
+    """
+    Packs ints (any iterable, e.g. a map()) the way free_qty_matrix() wants them.
+    
+    That's an int64 NumPy array when Numba is around, or just a list.
+    """
+    if HAVE_NUMBA:
+        return np.fromiter(values, dtype=np.int64)
+    return list(values)
+
+
+def _compute_price(daily_rate, dj_rate, days, qty, include_dj):
+    """
+    Prices a rental in cents: (equipment cost, DJ cost).
+    
+    Args:
+        daily_rate: Package price per day in cents (int64)
+        dj_rate: DJ price per day in cents (int64)
+        days: Rental days (int64)
+        qty: How many packages (int64)
+        include_dj: Add DJ service? (bool)
+    
+    Returns:
+        (base_price, dj_price) in cents as int64s - dj_price is 0 without a DJ
+    """
+    base_price = daily_rate * days * qty
+    dj_price = dj_rate * days * qty if include_dj else 0
+    return base_price, dj_price
+
+
+if HAVE_NUMBA:
+
+    # Compiled (or loaded from Numba's on-disk cache) on the first call,
+    # not at import time
+    compute_price = njit(cache=True)(_compute_price)
+    
+    @njit(cache=True, parallel=True)
+    def free_qty_matrix(stock, booking_pkg, booking_start, booking_end, booking_qty, day_lo, day_hi):
+        """
+        Works out how many of each package are free on each day.
+        
+        Args:
+            stock: Stock per package (int64[:])
+            booking_pkg: Row index into stock for each booking (int64[:])
+            booking_start: Booking start day ordinals (int64[:])
+            booking_end: Booking end day ordinals, inclusive (int64[:])
+            booking_qty: Booked quantity per booking (int64[:])
+            day_lo: First day ordinal of the calendar
+            day_hi: Last day ordinal of the calendar (inclusive)
+        
+        Returns:
+            int64[packages, days] matrix of free quantity
+        """
+        n_pkgs = stock.shape[0]
+        n_days = day_hi - day_lo + 1
+        free = np.empty((n_pkgs, n_days), dtype=np.int64)
+        
+        # Each package gets its own row, so threads never touch the same cells
+        for p in prange(n_pkgs):
+            for d in range(n_days):
+                free[p, d] = stock[p]
+            
+            for b in range(booking_pkg.shape[0]):
+                if booking_pkg[b] != p:
+                    continue
+                
+                # Clip the booking to the calendar window
+                lo = max(booking_start[b], day_lo) - day_lo
+                hi = min(booking_end[b], day_hi) - day_lo
+                for d in range(lo, hi + 1):
+                    free[p, d] -= booking_qty[b]
+        
+        return free
+
+else:
+
+    compute_price = _compute_price
+    
+    def free_qty_matrix(stock, booking_pkg, booking_start, booking_end, booking_qty, day_lo, day_hi):
+        """
+        Pure-Python version of the calendar kernel (used when Numba isn't installed).
+        
+        Same arguments and results as the compiled version, but returns
+        a list of lists instead of a NumPy matrix.
+        """
+        n_days = day_hi - day_lo + 1
+        free: List[List[int]] = [[qty] * n_days for qty in stock]
+        
+        for b in range(len(booking_pkg)):
+            row = free[booking_pkg[b]]
+            
+            # Clip the booking to the calendar window
+            lo = max(booking_start[b], day_lo) - day_lo
+            hi = min(booking_end[b], day_hi) - day_lo
+            for d in range(lo, hi + 1):
+                row[d] -= booking_qty[b]
+        
+        return free
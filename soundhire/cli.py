@@ -9,23 +9,49 @@ Commands:
 - package-details: Get full details on a specific package
 - create-booking: Make a new reservation
 - list-bookings: See all current bookings
+- calendar: Day-by-day availability for every package
+- repl: Run several commands over one connection (reads from stdin)
 
 Usage:
     python -m soundhire.cli <command> [options]
 """
 
 import sys
+import shlex
 import argparse
-from typing import NoReturn
-from .config import load_environment
-from .db import get_supabase_client
+from datetime import date
+from typing import NoReturn, Optional
+from .config import load_environment, get_database_url
+from .db import get_supabase_client, iter_async, run_async
 from . import models
 from . import availability
+from . import direct
+
+
+# How many bookings list-bookings fetches per request
+BOOKINGS_PAGE_SIZE = 500
+
+
+# Bound once at import so listings don't redo the lookup per row
+_usd = "${:.2f}".format
+
+
+def _iso_date(value: str) -> date:
+    """
+    Argparse type for YYYY-MM-DD dates.
+    
+    Bad dates get rejected up front, before we've talked to the database
+    at all, and commands receive real date objects.
+    """
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date '{value}' (expected YYYY-MM-DD)")
 
 
 def format_currency(amount: float) -> str:
     """Formats a number as USD currency."""
-    return f"${amount:.2f}"
+    return _usd(amount)
 
 
 def command_list_packages(args) -> None:
@@ -37,35 +63,38 @@ def command_list_packages(args) -> None:
     print("="*80 + "\n")
     
     try:
-        client = get_supabase_client()
-        packages = models.list_packages(client)
+        # Read straight from Postgres when a connection string is configured
+        if get_database_url():
+            packages = run_async(direct.list_packages_with_contents())
+        else:
+            packages = models.list_packages_with_contents(get_supabase_client())
         
         if not packages:
             print("No packages found in the database.")
             return
         
         for pkg in packages:
-            # Get package with gear contents
-            full_pkg = models.get_package_with_contents(pkg["id"], client)
+            # Build the whole block, then write it in one go
+            lines = [
+                f"📦 {pkg['name']} (ID: {pkg['id']})",
+                f"   Daily Rate: {_usd(pkg['daily_rate'])}",
+                f"   Stock Available: {pkg['stock']}"
+            ]
             
-            print(f"📦 {full_pkg['name']} (ID: {full_pkg['id']})")
-            print(f"   Daily Rate: {format_currency(full_pkg['daily_rate'])}")
-            print(f"   Stock Available: {full_pkg['stock']}")
-            
-            if full_pkg.get("description"):
-                print(f"   Description: {full_pkg['description']}")
+            if pkg.get("description"):
+                lines.append(f"   Description: {pkg['description']}")
             
             # Show included gear summary
-            gear_items = full_pkg.get("gear_items", [])
+            gear_items = pkg.get("gear_items", [])
             if gear_items:
-                print(f"   Included Gear ({len(gear_items)} items):")
-                for item in gear_items:
-                    gear = item.get("gear", {})
-                    qty = item.get("qty", 1)
-                    gear_name = gear.get("name", "Unknown")
-                    print(f"      • {qty}× {gear_name}")
+                lines.append(f"   Included Gear ({len(gear_items)} items):")
+                lines.extend([
+                    f"      • {item.get('qty', 1)}× {item.get('gear', {}).get('name', 'Unknown')}"
+                    for item in gear_items
+                ])
             
-            print()  # Blank line between packages
+            lines.append("")  # Blank line between packages
+            sys.stdout.write("\n".join(lines) + "\n")
         
         print(f"Total packages: {len(packages)}\n")
         
@@ -93,40 +122,43 @@ def command_package_details(args) -> None:
             sys.exit(1)
         
         # Basic package info
-        print(f"Name: {package['name']}")
-        print(f"Daily Rate: {format_currency(package['daily_rate'])}")
-        print(f"Stock: {package['stock']} available")
-        print(f"Created: {package.get('created_at', 'N/A')}")
+        lines = [
+            f"Name: {package['name']}",
+            f"Daily Rate: {_usd(package['daily_rate'])}",
+            f"Stock: {package['stock']} available",
+            f"Created: {package.get('created_at', 'N/A')}"
+        ]
         
         if package.get("description"):
-            print(f"\nDescription:\n{package['description']}")
+            lines.append(f"\nDescription:\n{package['description']}")
         
         # Detailed gear list
         gear_items = package.get("gear_items", [])
         if gear_items:
-            print(f"\n{'─'*80}")
-            print("INCLUDED GEAR:")
-            print(f"{'─'*80}\n")
+            lines.append(f"\n{'─'*80}")
+            lines.append("INCLUDED GEAR:")
+            lines.append(f"{'─'*80}\n")
             
             for item in gear_items:
                 gear = item.get("gear", {})
                 qty = item.get("qty", 1)
                 notes = item.get("notes", "")
                 
-                print(f"• {gear.get('name', 'Unknown')} (Qty: {qty})")
-                print(f"  Category: {gear.get('category', 'N/A')}")
+                lines.append(f"• {gear.get('name', 'Unknown')} (Qty: {qty})")
+                lines.append(f"  Category: {gear.get('category', 'N/A')}")
                 
                 if gear.get("details"):
-                    print(f"  Details: {gear['details']}")
+                    lines.append(f"  Details: {gear['details']}")
                 
                 if notes:
-                    print(f"  Notes: {notes}")
+                    lines.append(f"  Notes: {notes}")
                 
-                print()  # Blank line between items
+                lines.append("")  # Blank line between items
         else:
-            print("\nNo gear items configured for this package.")
+            lines.append("\nNo gear items configured for this package.")
         
-        print()
+        lines.append("")
+        sys.stdout.write("\n".join(lines) + "\n")
         
     except Exception as e:
         print(f"❌ Error retrieving package details: {str(e)}", file=sys.stderr)
@@ -137,8 +169,8 @@ def command_create_booking(args) -> None:
     """
     Creates a new rental booking.
     
-    Checks availability first, calculates the price, then creates
-    the booking if everything looks good.
+    Availability check, pricing and the insert all happen in one
+    database call, so nobody can grab the last unit halfway through.
     """
     print("\n" + "="*80)
     print("CREATE NEW BOOKING")
@@ -147,16 +179,8 @@ def command_create_booking(args) -> None:
     try:
         client = get_supabase_client()
         
-        # Make sure the package exists
-        pkg_response = client.table("packages").select("name").eq("id", args.package_id).execute()
-        if not pkg_response.data:
-            print(f"❌ Package ID {args.package_id} not found.")
-            sys.exit(1)
-        
-        package_name = pkg_response.data[0]["name"]
-        
         # Show what they're trying to book
-        print(f"Package: {package_name} (ID: {args.package_id})")
+        print(f"Package ID: {args.package_id}")
         print(f"Customer: {args.name}")
         print(f"Contact: {args.phone} | {args.email}")
         print(f"Dates: {args.start} to {args.end}")
@@ -164,55 +188,38 @@ def command_create_booking(args) -> None:
         print(f"DJ Service: {'Yes' if args.include_dj else 'No'}")
         print()
         
-        # Check if we have it available
-        print("Checking availability...")
-        available, message = availability.is_package_available(
-            args.package_id,
-            args.start,
-            args.end,
-            args.qty,
-            client
+        # Check, price and save in one go
+        print("Checking availability and creating booking...")
+        result = availability.book_package(
+            package_id=args.package_id,
+            start_date=args.start,
+            end_date=args.end,
+            qty=args.qty,
+            include_dj=args.include_dj,
+            customer_name=args.name,
+            phone=args.phone,
+            email=args.email,
+            client=client
         )
         
-        print(f"✓ {message}\n")
-        
-        if not available:
-            print("❌ Can't make this booking - not enough availability.")
+        if not result["ok"]:
+            print(f"❌ {result['detail']}")
+            print("❌ Can't make this booking.")
             sys.exit(1)
         
-        # Work out the price
-        print("Calculating price...")
-        total_price, breakdown = availability.calculate_total_price(
-            args.package_id,
-            args.start,
-            args.end,
-            args.qty,
-            args.include_dj,
-            client
-        )
+        print(f"✓ {result['detail']}\n")
         
+        breakdown = result["breakdown"]
         print(availability.format_price_breakdown(breakdown))
         print()
         
-        # Save it to the database
-        print("Creating booking...")
-        booking = models.create_booking(
-            package_id=args.package_id,
-            customer_name=args.name,
-            phone=args.phone,
-            email=args.email,
-            start_date=args.start,
-            end_date=args.end,
-            qty=args.qty,
-            include_dj=args.include_dj,
-            total_price=total_price,
-            client=client
-        )
+        booking = result["booking"]
+        total_price = breakdown["total"]
         
         print(f"✅ Booking created successfully!")
         print(f"   Booking ID: {booking['id']}")
         print(f"   Status: {booking['status']}")
-        print(f"   Total Price: {format_currency(total_price)}")
+        print(f"   Total Price: {_usd(total_price)}")
         print()
         
     except ValueError as e:
@@ -226,55 +233,149 @@ def command_create_booking(args) -> None:
 def command_list_bookings(args) -> None:
     """
     Shows all bookings we have in the system.
+    
+    Bookings are streamed a page at a time, so big tables don't have to
+    fit in memory and output starts as soon as the first page arrives.
     """
     print("\n" + "="*80)
     print("ALL BOOKINGS")
     print("="*80 + "\n")
     
     try:
-        client = get_supabase_client()
-        bookings = models.list_bookings(client)
+        # Read straight from Postgres when a connection string is configured
+        if get_database_url():
+            bookings = iter_async(direct.iter_bookings(page_size=BOOKINGS_PAGE_SIZE))
+        else:
+            bookings = models.iter_bookings(get_supabase_client(), page_size=BOOKINGS_PAGE_SIZE)
         
-        if not bookings:
-            print("No bookings found in the database.")
-            return
+        count = 0
         
         for booking in bookings:
-            # Pull out the package name
-            package_name = "Unknown"
-            if booking.get("packages"):
-                package_name = booking["packages"].get("name", "Unknown")
+            package_name = booking.package_name or "Unknown"
+            
+            # Display the booking info - built up, then written in one go
+            lines = [
+                f"🎫 Booking #{booking.id} - {booking.status.upper()}",
+                f"   Customer: {booking.customer_name}",
+                f"   Contact: {booking.phone} | {booking.email}",
+                f"   Package: {package_name}",
+                f"   Dates: {booking.start_date} to {booking.end_date}",
+                f"   Quantity: {booking.qty}"
+            ]
             
-            # Display the booking info
-            print(f"🎫 Booking #{booking['id']} - {booking['status'].upper()}")
-            print(f"   Customer: {booking['customer_name']}")
-            print(f"   Contact: {booking['phone']} | {booking['email']}")
-            print(f"   Package: {package_name}")
-            print(f"   Dates: {booking['start_date']} to {booking['end_date']}")
-            print(f"   Quantity: {booking['qty']}")
+            if booking.include_dj:
+                lines.append("   DJ Included: Yes")
             
-            if booking.get('include_dj'):
-                print(f"   DJ Included: Yes")
+            lines.append(f"   Total Price: {_usd(booking.total_price)}")
+            lines.append(f"   Created: {booking.created_at or 'N/A'}")
+            lines.append("")
+            sys.stdout.write("\n".join(lines) + "\n")
             
-            print(f"   Total Price: {format_currency(booking['total_price'])}")
-            print(f"   Created: {booking.get('created_at', 'N/A')}")
-            print()
+            count += 1
+            
+            # Push each finished page out rather than waiting for the end
+            if count % BOOKINGS_PAGE_SIZE == 0:
+                sys.stdout.flush()
+        
+        if count == 0:
+            print("No bookings found in the database.")
+            return
         
-        print(f"Total bookings: {len(bookings)}\n")
+        print(f"Total bookings: {count}\n")
         
     except Exception as e:
         print(f"❌ Error listing bookings: {str(e)}", file=sys.stderr)
         sys.exit(1)
 
 
-def main() -> NoReturn:
+def command_calendar(args) -> None:
     """
-    Main entry point - handles command parsing and routing.
+    Shows how many of each package are free on each day in a date range.
     """
-    # Load our environment variables
-    load_environment()
+    print("\n" + "="*80)
+    print(f"AVAILABILITY CALENDAR - {args.start} to {args.end}")
+    print("="*80 + "\n")
+    
+    try:
+        client = get_supabase_client()
+        packages, days, free = availability.calendar(args.start, args.end, client)
+        
+        if not packages:
+            print("No packages found in the database.")
+            return
+        
+        # Header row: day of month for each column
+        name_width = max(len(pkg["name"]) for pkg in packages)
+        lines = [" " * name_width + " " + "".join(f"{day.day:>3}" for day in days)]
+        
+        for row, pkg in enumerate(packages):
+            counts = "".join(f"{free[row][col]:>3}" for col in range(len(days)))
+            lines.append(f"{pkg['name']:<{name_width}} {counts}")
+        
+        sys.stdout.write("\n".join(lines) + "\n")
+        
+        print("\nNumbers are how many of each package are free that day.\n")
+        
+    except ValueError as e:
+        print(f"❌ Validation error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    except Exception as e:
+        print(f"❌ Error building calendar: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+
+def command_repl(args) -> None:
+    """
+    Runs commands read from stdin, one per line, in a single process.
+    
+    Everything shares the same Supabase client, so the connection (and
+    its TLS handshake) is paid for once instead of once per command.
+    Blank lines and # comments are skipped; "exit" or "quit" stops.
+    
+    Example:
+        printf 'list-packages\npackage-details --id 2\n' | python -m soundhire.cli repl
+    """
+    parser = _get_parser()
+    interactive = sys.stdin.isatty()
     
-    # Set up the command parser
+    while True:
+        if interactive:
+            print("soundhire> ", end="", flush=True)
+        
+        line = sys.stdin.readline()
+        if not line:
+            break  # End of input
+        
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line in ("exit", "quit"):
+            break
+        
+        try:
+            words = shlex.split(line)
+        except ValueError as e:
+            # e.g. an unclosed quote - report it and wait for the next line
+            print(f"❌ Usage error: {str(e)}", file=sys.stderr)
+            continue
+        
+        try:
+            command_args = parser.parse_args(words)
+            
+            if command_args.command == "repl":
+                print("Already in repl mode.")
+                continue
+            
+            _run_command(command_args)
+        except SystemExit:
+            # Commands bail out with sys.exit() on errors - keep the session going
+            pass
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    """
+    Sets up the argument parser with all our subcommands.
+    """
     parser = argparse.ArgumentParser(
         description="SoundHire Cloud - Sound Equipment Rental Management",
         epilog="Check README.md for more info"
@@ -310,8 +411,8 @@ def main() -> NoReturn:
     booking_parser.add_argument("--name", type=str, required=True, help="Customer name")
     booking_parser.add_argument("--phone", type=str, required=True, help="Phone number")
     booking_parser.add_argument("--email", type=str, required=True, help="Email address")
-    booking_parser.add_argument("--start", type=str, required=True, help="Start date (YYYY-MM-DD)")
-    booking_parser.add_argument("--end", type=str, required=True, help="End date (YYYY-MM-DD)")
+    booking_parser.add_argument("--start", type=_iso_date, required=True, help="Start date (YYYY-MM-DD)")
+    booking_parser.add_argument("--end", type=_iso_date, required=True, help="End date (YYYY-MM-DD)")
     booking_parser.add_argument("--qty", type=int, required=True, help="How many packages")
     booking_parser.add_argument(
         "--include-dj",
@@ -326,22 +427,72 @@ def main() -> NoReturn:
         help="Show all bookings"
     )
     
-    # Parse and route
-    args = parser.parse_args()
+    # calendar command
+    calendar_parser = subparsers.add_parser(
+        "calendar",
+        help="Show day-by-day availability for every package"
+    )
+    calendar_parser.add_argument("--start", type=_iso_date, required=True, help="First day (YYYY-MM-DD)")
+    calendar_parser.add_argument("--end", type=_iso_date, required=True, help="Last day (YYYY-MM-DD)")
+    
+    # repl command
+    subparsers.add_parser(
+        "repl",
+        help="Run commands from stdin over one shared connection"
+    )
     
-    # Send to the right command handler
-    if args.command == "list-packages":
-        command_list_packages(args)
-    elif args.command == "package-details":
-        command_package_details(args)
-    elif args.command == "create-booking":
-        command_create_booking(args)
-    elif args.command == "list-bookings":
-        command_list_bookings(args)
-    else:
-        parser.print_help()
+    return parser
+
+
+# Built on first use, then reused (the repl parses every line with it)
+_PARSER: Optional[argparse.ArgumentParser] = None
+
+
+def _get_parser() -> argparse.ArgumentParser:
+    """
+    Returns the argument parser, building it the first time only.
+    """
+    global _PARSER
+    if _PARSER is None:
+        _PARSER = _build_parser()
+    return _PARSER
+
+
+# Subcommand name -> handler
+HANDLERS = {
+    "list-packages": command_list_packages,
+    "package-details": command_package_details,
+    "create-booking": command_create_booking,
+    "list-bookings": command_list_bookings,
+    "calendar": command_calendar,
+    "repl": command_repl
+}
+
+
+def _run_command(args) -> None:
+    """
+    Sends parsed arguments to the right command handler.
+    """
+    handler = HANDLERS.get(args.command)
+    
+    if handler is None:
+        _get_parser().print_help()
         sys.exit(1)
     
+    handler(args)
+
+
+def main() -> NoReturn:
+    """
+    Main entry point - handles command parsing and routing.
+    """
+    # Load our environment variables
+    load_environment()
+    
+    # Parse and route
+    args = _get_parser().parse_args()
+    _run_command(args)
+    
     sys.exit(0)
 
 
@@ -61,4 +61,17 @@ def get_supabase_url() -> str:
 
 def get_supabase_key() -> str:
     """Gets the Supabase API key (anon or service role)."""
-    return get_settings()["SUPABASE_KEY"]
\ No newline at end of file
+    return get_settings()["SUPABASE_KEY"]
+
+
+def get_database_url() -> Optional[str]:
+    """
+    Gets the direct Postgres connection string, if one is configured.
+    
+    SUPABASE_DB_URL is optional. When it's set, read-heavy commands talk
+    to Postgres directly (see direct.py) instead of going through the
+    REST API. Use the direct connection string from the Supabase dashboard
+    rather than the transaction pooler, which doesn't support prepared
+    statements.
+    """
+    return os.getenv("SUPABASE_DB_URL") or None
\ No newline at end of file
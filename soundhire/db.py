@@ -4,23 +4,90 @@ Database connection handling for SoundHire Cloud.
 Manages the Supabase client connection used across the entire application.
 Keeps things simple with a singleton pattern so we're not creating
 multiple connections unnecessarily.
+
+Also owns an async PostgREST client (for the models.a* functions) and the
+optional asyncpg pool used for direct Postgres reads.
 """
 
-from typing import Optional
+import asyncio
+import atexit
+import functools
+import json
+from typing import Any, AsyncIterator, Awaitable, Iterator, Optional, TypeVar
+import httpx
+from postgrest import AsyncPostgrestClient
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
+from postgrest.utils import AsyncClient, SyncClient
 from supabase import create_client, Client
-from .config import get_supabase_url, get_supabase_key
+from .config import get_supabase_url, get_supabase_key, get_database_url
+
+# orjson is optional - it just makes parsing big responses faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+T = TypeVar("T")
 
 
-# Single client instance shared across the app
-_supabase_client: Optional[Client] = None
+# HTTP settings for talking to PostgREST - keep connections warm so
+# repeated queries skip the TCP + TLS handshake. Sized so a burst of
+# concurrent queries (thread pool, gather) shares the pool instead of
+# opening throwaway connections.
+HTTP_TIMEOUT = 10.0
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=50, keepalive_expiry=30.0)
 
 
+def _parse_json_with_orjson(response: httpx.Response) -> None:
+    """
+    Response hook: makes response.json() parse with orjson instead of the stdlib.
+    
+    The hook runs before the body is read, so the body is only parsed
+    when PostgREST's client actually asks for it.
+    """
+    response.json = lambda **kwargs: orjson.loads(response.content)
+
+
+async def _aparse_json_with_orjson(response: httpx.Response) -> None:
+    """Async flavour of _parse_json_with_orjson() for the async client's hooks."""
+    _parse_json_with_orjson(response)
+
+
+def _configure_http_session(client: Client) -> None:
+    """
+    Swaps the PostgREST HTTP session for one with HTTP/2 and keepalive.
+    
+    The replacement keeps the base URL and auth headers of the session
+    supabase-py built, so queries behave exactly the same - they just
+    reuse open connections instead of reconnecting. If orjson is installed,
+    responses are parsed with it too.
+    """
+    postgrest = client.postgrest
+    old_session = postgrest.session
+    
+    event_hooks = {"response": [_parse_json_with_orjson]} if orjson is not None else None
+    
+    postgrest.session = SyncClient(
+        base_url=old_session.base_url,
+        headers=old_session.headers,
+        timeout=HTTP_TIMEOUT,
+        limits=HTTP_LIMITS,
+        event_hooks=event_hooks,
+        follow_redirects=True,
+        http2=True
+    )
+    
+    old_session.close()
+
+
+@functools.lru_cache(maxsize=1)
 def get_supabase_client() -> Client:
     """
     Gets or creates the Supabase client.
     
-    Uses singleton pattern - creates once on first call, then reuses it.
-    This keeps things efficient and maintains proper connection pooling.
+    Uses singleton pattern - created once on first call (lru_cache
+    remembers it), then reused. So every query shares one connection
+    pool, and the `if client is None` fallback everywhere costs nothing.
     
     Returns:
         Ready-to-use Supabase client
@@ -29,21 +96,16 @@ def get_supabase_client() -> Client:
         ValueError: When config is messed up
         Exception: When we can't connect to Supabase
     """
-    global _supabase_client
-    
-    # If we already have a client, just return it
-    if _supabase_client is not None:
-        return _supabase_client
-    
     try:
         # Pull credentials from environment
         url = get_supabase_url()
         key = get_supabase_key()
         
         # Set up the Supabase client
-        _supabase_client = create_client(url, key)
+        client = create_client(url, key)
+        _configure_http_session(client)
         
-        return _supabase_client
+        return client
         
     except ValueError as e:
         # Something's wrong with the config
@@ -62,6 +124,172 @@ def get_supabase_client() -> Client:
 def reset_client() -> None:
     """
     Resets the global client - mainly useful for testing.
+    
+    Also drops anything availability has cached, since it came from
+    the old connection.
     """
-    global _supabase_client
-    _supabase_client = None
\ No newline at end of file
+    # Imported here because availability imports this module
+    from .availability import invalidate_cache
+    
+    global _async_postgrest_client
+    
+    get_supabase_client.cache_clear()
+    _async_postgrest_client = None
+    invalidate_cache()
+
+
+# ============================================================================
+# ASYNC POSTGREST CLIENT - same REST API, awaitable
+# ============================================================================
+
+# Shared async client; like the asyncpg pool, it belongs to run_async()'s loop
+_async_postgrest_client: Optional[AsyncPostgrestClient] = None
+
+
+def get_async_postgrest_client() -> AsyncPostgrestClient:
+    """
+    Gets or creates the async PostgREST client.
+    
+    Talks to the same REST API with the same credentials as the Supabase
+    client, but its queries can be awaited - so several of them can be
+    in flight at once (asyncio.gather), or results streamed page by page.
+    Gets the same HTTP/2 + keepalive pool (and orjson) as the sync client.
+    
+    Its connections belong to the event loop that first uses them, so
+    run async code through run_async() rather than asyncio.run().
+    
+    Returns:
+        Ready-to-use AsyncPostgrestClient
+        
+    Raises:
+        ValueError: When config is messed up
+    """
+    global _async_postgrest_client
+    
+    if _async_postgrest_client is not None:
+        return _async_postgrest_client
+    
+    url = get_supabase_url()
+    key = get_supabase_key()
+    
+    client = AsyncPostgrestClient(f"{url}/rest/v1")
+    
+    # Same auth headers supabase-py sends
+    event_hooks = {"response": [_aparse_json_with_orjson]} if orjson is not None else None
+    client.session = AsyncClient(
+        base_url=client.session.base_url,
+        headers={**DEFAULT_POSTGREST_CLIENT_HEADERS, "apikey": key, "Authorization": f"Bearer {key}"},
+        timeout=HTTP_TIMEOUT,
+        limits=HTTP_LIMITS,
+        event_hooks=event_hooks,
+        follow_redirects=True,
+        http2=True
+    )
+    
+    _async_postgrest_client = client
+    return client
+
+
+# ============================================================================
+# DIRECT POSTGRES (asyncpg) - optional, used for hot read paths
+# ============================================================================
+
+# Shared asyncpg pool, plus the event loop it lives on
+_asyncpg_pool: Optional[Any] = None
+_event_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def _init_asyncpg_connection(conn: Any) -> None:
+    """
+    Decodes json/jsonb columns into Python objects, same as PostgREST does.
+    """
+    for type_name in ("json", "jsonb"):
+        await conn.set_type_codec(
+            type_name,
+            encoder=json.dumps,
+            decoder=json.loads,
+            schema="pg_catalog"
+        )
+
+
+async def get_asyncpg_pool() -> Any:
+    """
+    Gets or creates the asyncpg connection pool.
+    
+    Talks to Postgres over its binary wire protocol - no HTTPS, no JSON
+    round-trip through PostgREST - which is a lot quicker for big reads.
+    Queries run through the pool are prepared and cached per connection.
+    
+    Returns:
+        asyncpg.Pool (1-4 connections)
+        
+    Raises:
+        ValueError: When SUPABASE_DB_URL isn't set
+        ImportError: When asyncpg isn't installed
+    """
+    global _asyncpg_pool
+    
+    if _asyncpg_pool is not None:
+        return _asyncpg_pool
+    
+    dsn = get_database_url()
+    if not dsn:
+        raise ValueError(
+            "SUPABASE_DB_URL isn't set. "
+            "Add your Supabase Postgres connection string to .env to use direct reads."
+        )
+    
+    # Optional dependency - only needed when direct reads are switched on
+    import asyncpg
+    
+    _asyncpg_pool = await asyncpg.create_pool(
+        dsn,
+        min_size=1,
+        max_size=4,
+        init=_init_asyncpg_connection
+    )
+    atexit.register(_close_asyncpg_pool)
+    
+    return _asyncpg_pool
+
+
+def run_async(coro: Awaitable[T]) -> T:
+    """
+    Runs a coroutine to completion from regular (sync) code.
+    
+    Everything runs on one long-lived event loop rather than a fresh
+    asyncio.run() each time. The asyncpg pool is tied to the loop it was
+    created on, so this is what lets the repl keep its Postgres
+    connections open between commands.
+    """
+    global _event_loop
+    
+    if _event_loop is None or _event_loop.is_closed():
+        _event_loop = asyncio.new_event_loop()
+    
+    return _event_loop.run_until_complete(coro)
+
+
+def iter_async(agen: AsyncIterator[T]) -> Iterator[T]:
+    """
+    Walks an async generator from regular (sync) code, on run_async()'s loop.
+    
+    Items come out one at a time as the generator produces them, so a
+    streaming async read stays streaming in a plain for loop.
+    """
+    while True:
+        try:
+            yield run_async(agen.__anext__())
+        except StopAsyncIteration:
+            return
+
+
+def _close_asyncpg_pool() -> None:
+    """
+    Closes the asyncpg pool cleanly at exit.
+    """
+    global _asyncpg_pool
+    
+    if _asyncpg_pool is not None:
+        run_async(_asyncpg_pool.close())
+        _asyncpg_pool = None
\ No newline at end of file
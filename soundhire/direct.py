@@ -0,0 +1,119 @@
+"""
+Direct Postgres read paths for SoundHire Cloud.
+
+Async versions of the busiest read queries in models.py, run straight
+against Postgres with asyncpg instead of through the Supabase REST API.
+Skipping HTTPS + PostgREST + JSON makes big listings much faster.
+
+Only reads live here - writes still go through the Supabase client so
+they keep its auth and row-level security. Switched on by setting
+SUPABASE_DB_URL; see db.get_asyncpg_pool().
+
+Each function returns the same shape as its models.py counterpart - the
+booking reads return the same Booking objects, and package rows just have
+date/Decimal values where PostgREST would give strings/floats.
+"""
+
+from typing import Any, AsyncIterator, Dict, List, Optional
+from .db import get_asyncpg_pool
+from .models import Booking, DateLike, _to_date
+
+
+async def list_packages_with_contents(pool: Optional[Any] = None) -> List[Dict[str, Any]]:
+    """
+    Retrieve all rental packages along with the gear each one contains.
+    
+    Same as models.list_packages_with_contents(), read from the
+    packages_with_gear view.
+    
+    Args:
+        pool: asyncpg pool (optional, uses the shared one if not provided)
+    
+    Returns:
+        List of package dictionaries, each with a nested 'gear_items' list
+    """
+    if pool is None:
+        pool = await get_asyncpg_pool()
+    
+    rows = await pool.fetch("SELECT * FROM packages_with_gear ORDER BY daily_rate")
+    
+    return [dict(row) for row in rows]
+
+
+# Columns for the booking listing - same as models.BOOKING_LIST_FIELDS
+_BOOKING_LIST_SQL = """
+    SELECT id, customer_name, phone, email, start_date, end_date,
+           qty, status, total_price, include_dj, created_at, package_name
+    FROM bookings_with_package
+"""
+
+
+async def iter_bookings(page_size: int = 500, pool: Optional[Any] = None) -> AsyncIterator[Booking]:
+    """
+    Yield every booking (with package name) one page at a time.
+    
+    Same rows and order as models.iter_bookings() (newest first by id), and
+    likewise never holds more than page_size rows in memory. Pages are
+    keyset-based ("ids below the last one we saw"), so each one is a quick
+    index range scan and no connection is held open between pages.
+    
+    Args:
+        page_size: How many rows to fetch per query
+        pool: asyncpg pool (optional)
+    
+    Yields:
+        Bookings, each with a package_name, newest first
+    """
+    if pool is None:
+        pool = await get_asyncpg_pool()
+    
+    rows = await pool.fetch(_BOOKING_LIST_SQL + "ORDER BY id DESC LIMIT $1", page_size)
+    
+    while rows:
+        for row in rows:
+            yield Booking.from_row(row)
+        
+        # A short page means we've reached the end
+        if len(rows) < page_size:
+            return
+        
+        rows = await pool.fetch(
+            _BOOKING_LIST_SQL + "WHERE id < $1 ORDER BY id DESC LIMIT $2",
+            rows[-1]["id"],
+            page_size
+        )
+
+
+async def get_bookings_for_package(
+    package_id: int,
+    start_date: DateLike,
+    end_date: DateLike,
+    pool: Optional[Any] = None
+) -> List[Booking]:
+    """
+    Get all bookings that overlap with a given date range for a package.
+    
+    Same as models.get_bookings_for_package() - runs the same
+    bookings_overlapping() function.
+    
+    Args:
+        package_id: Package to check
+        start_date: Start of date range to check (YYYY-MM-DD or a date)
+        end_date: End of date range to check (YYYY-MM-DD or a date)
+        pool: asyncpg pool (optional)
+    
+    Returns:
+        List of overlapping Bookings (excluding cancelled ones)
+    """
+    if pool is None:
+        pool = await get_asyncpg_pool()
+    
+    # asyncpg wants real date objects for DATE parameters
+    rows = await pool.fetch(
+        "SELECT id, start_date, end_date, qty FROM bookings_overlapping($1, $2, $3)",
+        package_id,
+        _to_date(start_date),
+        _to_date(end_date)
+    )
+    
+    return [Booking.from_row(row) for row in rows]
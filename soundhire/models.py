@@ -10,12 +10,73 @@ This module provides functions for CRUD operations on all database tables:
 All functions interact with Supabase PostgreSQL database.
 """
 
-from typing import List, Dict, Optional, Any
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+from operator import itemgetter
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypedDict, Union
 # Ensure the supabase package is installed via pip before running the script
 # pip install supabase
 
+from postgrest import AsyncPostgrestClient
 from supabase import Client
-from .db import get_supabase_client
+from .db import get_async_postgrest_client, get_supabase_client
+
+# ============================================================================
+# MONEY HELPERS
+# ============================================================================
+
+# Money is handled as whole cents (ints) in Python - exact, and int math
+# is cheap. NUMERIC values from the database are converted on the way in.
+
+def to_cents(amount: Any) -> int:
+    """
+    Converts a money amount (NUMERIC from the API, Decimal or str) to cents.
+    
+    Example:
+        to_cents("75.50") → 7550
+    """
+    return int((Decimal(str(amount)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents: int) -> Decimal:
+    """
+    Converts cents back to an exact Decimal amount.
+    
+    Example:
+        from_cents(7550) → Decimal('75.50')
+    """
+    return Decimal(cents).scaleb(-2)
+
+
+# ============================================================================
+# CHANGE LISTENERS
+# ============================================================================
+
+# Called as listener(table, package_id) after this module writes packages
+# or bookings, so layers above (availability's caches) can drop stale copies
+# without this module having to import them.
+_change_listeners: List[Callable[[str, int], None]] = []
+
+
+def on_change(listener: Callable[[str, int], None]) -> None:
+    """
+    Registers a callback for package and booking writes.
+    
+    It gets called with the table that changed ("packages" or "bookings")
+    and the package the change was about.
+    """
+    _change_listeners.append(listener)
+
+
+def _notify_change(table: str, package_ids: Iterable[int]) -> None:
+    """Tells every registered listener about a write."""
+    for package_id in package_ids:
+        for listener in _change_listeners:
+            listener(table, package_id)
+
 
 # ============================================================================
 # PACKAGE OPERATIONS (CREATE, READ, UPDATE, DELETE)
@@ -38,12 +99,39 @@ def list_packages(client: Optional[Client] = None) -> List[Dict[str, Any]]:
     return response.data
 
 
+def list_packages_with_contents(client: Optional[Client] = None) -> List[Dict[str, Any]]:
+    """
+    Retrieve all rental packages along with the gear each one contains.
+    
+    Reads the packages_with_gear materialized view, where each package's
+    gear is already flattened into a JSON array - so this is a single
+    request and a plain scan on the server, no joins.
+    
+    Args:
+        client: Supabase client (optional)
+        
+    Returns:
+        List of package dictionaries, each with a nested 'gear_items' list
+    """
+    if client is None:
+        client = get_supabase_client()
+    
+    response = (
+        client.table("packages_with_gear")
+        .select("*")
+        .order("daily_rate")
+        .execute()
+    )
+    
+    return response.data
+
+
 def get_package_with_contents(package_id: int, client: Optional[Client] = None) -> Optional[Dict[str, Any]]:
     """
     Get detailed information about a package including all gear items it contains.
     
-    This performs a JOIN query to fetch the package along with all associated
-    gear items through the package_gear junction table.
+    The gear (through the package_gear junction table) is embedded in the
+    same request, so it's one round-trip for the package and all its gear.
     
     Args:
         package_id: ID of the package to retrieve
@@ -55,27 +143,16 @@ def get_package_with_contents(package_id: int, client: Optional[Client] = None)
     if client is None:
         client = get_supabase_client()
     
-    # Get the package basic info
-    pkg_response = client.table("packages").select("*").eq("id", package_id).execute()
-    
-    if not pkg_response.data:
-        return None
-    
-    package = pkg_response.data[0]
-    
-    # Get associated gear items via junction table
-    # This demonstrates working with related tables
-    gear_response = (
-        client.table("package_gear")
-        .select("qty, notes, gear(id, name, category, details)")
-        .eq("package_id", package_id)
+    # PostgREST follows the foreign keys and nests each package_gear row
+    # (with its gear) under gear_items - same shape as packages_with_gear
+    response = (
+        client.table("packages")
+        .select("*, gear_items:package_gear(qty, notes, gear(id, name, category, details))")
+        .eq("id", package_id)
         .execute()
     )
     
-    # Format the gear items for easy display
-    package["gear_items"] = gear_response.data
-    
-    return package
+    return response.data[0] if response.data else None
 
 
 def create_package(
@@ -89,9 +166,13 @@ def create_package(
     """
     Create a new rental package with associated gear items.
     
-    This function performs multiple INSERT operations:
+    Everything goes through the create_package_with_items() Postgres
+    function, so it's one round-trip no matter how many items there are:
     1. Insert the package record
-    2. Insert package_gear records for each included item
+    2. Insert all package_gear records in a single batch
+    Both happen in one transaction - if a gear row fails, no package is left behind.
+    (The packages_with_gear listing is refreshed by a trigger in that same
+    transaction.)
     
     Args:
         name: Package name (e.g., "Deluxe Sound Package")
@@ -116,29 +197,28 @@ def create_package(
     if client is None:
         client = get_supabase_client()
     
-    # Insert the package
-    pkg_data = {
-        "name": name,
-        "description": description,
-        "daily_rate": daily_rate,
-        "stock": stock
-    }
-    
-    pkg_response = client.table("packages").insert(pkg_data).execute()
-    package = pkg_response.data[0]
-    package_id = package["id"]
-    
-    # Insert associated gear items
-    for item in items:
-        gear_data = {
-            "package_id": package_id,
+    # All the gear rows, sent together
+    rows = [
+        {
             "gear_id": item["gear_id"],
             "qty": item["qty"],
             "notes": item.get("notes", "")
         }
-        client.table("package_gear").insert(gear_data).execute()
+        for item in items
+    ]
     
-    return package
+    response = client.rpc(
+        "create_package_with_items",
+        {
+            "p_name": name,
+            "p_description": description,
+            "p_daily_rate": daily_rate,
+            "p_stock": stock,
+            "p_items": rows
+        }
+    ).execute()
+    
+    return response.data
 
 
 def update_package(
@@ -187,6 +267,8 @@ def update_package(
         .execute()
     )
     
+    _notify_change("packages", [package_id])
+    
     return response.data[0] if response.data else None
 
 
@@ -213,6 +295,7 @@ def delete_package(package_id: int, client: Optional[Client] = None) -> bool:
         client = get_supabase_client()
     
     client.table("packages").delete().eq("id", package_id).execute()
+    _notify_change("packages", [package_id])
     return True
 
 
@@ -241,18 +324,151 @@ def list_gear(client: Optional[Client] = None) -> List[Dict[str, Any]]:
 # BOOKING OPERATIONS
 # ============================================================================
 
+# Columns the booking listings actually show (from the bookings_with_package
+# view) - skips package_id and the generated rental_range, which only
+# matter to the database
+BOOKING_LIST_FIELDS = (
+    "id,customer_name,phone,email,start_date,end_date,qty,status,"
+    "total_price,include_dj,created_at,package_name"
+)
+
+# All an overlap / availability check needs from each booking
+BOOKING_OVERLAP_FIELDS = "id,start_date,end_date,qty"
+
+
+# Dates can come in as "YYYY-MM-DD" strings or already-parsed date objects.
+# Parse them once with _to_date() where the code needs real dates, and let
+# str() turn them back into YYYY-MM-DD only where a query needs a string.
+DateLike = Union[str, date]
+
+
+def _to_date(value: DateLike) -> date:
+    """Turns a YYYY-MM-DD string into a date (dates pass straight through)."""
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+@dataclass(slots=True, frozen=True)
+class Booking:
+    """
+    One booking, as returned by the booking query functions.
+    
+    Slotted, so each one is much smaller than the row dict it's built
+    from, and attribute reads are quick - this adds up when availability
+    code goes through thousands of them.
+    
+    Only id, dates and qty are always there; the rest are None when the
+    query didn't select them (see BOOKING_LIST_FIELDS / BOOKING_OVERLAP_FIELDS).
+    """
+    id: int
+    start_date: date
+    end_date: date
+    qty: int
+    package_id: Optional[int] = None
+    status: Optional[str] = None
+    total_price: Optional[Decimal] = None
+    include_dj: Optional[bool] = None
+    customer_name: Optional[str] = None
+    phone: Optional[str] = None
+    email: Optional[str] = None
+    created_at: Optional[Any] = None
+    package_name: Optional[str] = None
+    
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "Booking":
+        """
+        Builds a Booking from a row dict (PostgREST or asyncpg).
+        
+        Dates are parsed and total_price becomes an exact Decimal;
+        columns Booking doesn't know about (e.g. rental_range) are ignored.
+        """
+        total_price = row.get("total_price")
+        
+        return cls(
+            id=row["id"],
+            start_date=_to_date(row["start_date"]),
+            end_date=_to_date(row["end_date"]),
+            qty=row["qty"],
+            package_id=row.get("package_id"),
+            status=row.get("status"),
+            total_price=None if total_price is None else Decimal(str(total_price)),
+            include_dj=row.get("include_dj"),
+            customer_name=row.get("customer_name"),
+            phone=row.get("phone"),
+            email=row.get("email"),
+            created_at=row.get("created_at"),
+            package_name=row.get("package_name")
+        )
+
+
+class BookingInput(TypedDict):
+    """The fields needed to create one booking (see create_bookings_bulk)."""
+    package_id: int
+    customer_name: str
+    phone: str
+    email: str
+    start_date: DateLike
+    end_date: DateLike
+    qty: int
+    include_dj: bool
+    total_price_cents: int
+
+
+# Pulls a BookingInput's values out in one call, in _booking_row() order
+_BOOKING_INPUT_VALUES = itemgetter(
+    "package_id", "customer_name", "phone", "email", "start_date",
+    "end_date", "qty", "include_dj", "total_price_cents"
+)
+
+def _booking_row(
+    package_id: int,
+    customer_name: str,
+    phone: str,
+    email: str,
+    start_date: DateLike,
+    end_date: DateLike,
+    qty: int,
+    include_dj: bool,
+    total_price_cents: int
+) -> Dict[str, Any]:
+    """
+    Builds the JSON-ready insert row for one booking.
+    
+    Dates go out as YYYY-MM-DD, the price as an exact "123.45" string
+    (JSON has no decimal type), and every new booking starts out pending.
+    """
+    return {
+        "package_id": package_id,
+        "customer_name": customer_name,
+        "phone": phone,
+        "email": email,
+        "start_date": str(start_date),
+        "end_date": str(end_date),
+        "qty": qty,
+        "include_dj": include_dj,
+        "total_price": str(from_cents(total_price_cents)),
+        "status": "pending"
+    }
+
+
+def _insert_bookings(rows: List[Dict[str, Any]], client: Client) -> List[Booking]:
+    """Inserts ready-made booking rows in one request."""
+    response = client.table("bookings").insert(rows).execute()
+    _notify_change("bookings", {row["package_id"] for row in rows})
+    return [Booking.from_row(row) for row in response.data]
+
+
 def create_booking(
     package_id: int,
     customer_name: str,
     phone: str,
     email: str,
-    start_date: str,
-    end_date: str,
+    start_date: DateLike,
+    end_date: DateLike,
     qty: int,
     include_dj: bool,
-    total_price: float,
+    total_price_cents: int,
     client: Optional[Client] = None
-) -> Dict[str, Any]:
+) -> Booking:
     """
     Create a new booking reservation.
     
@@ -264,67 +480,294 @@ def create_booking(
         customer_name: Customer's full name
         phone: Contact phone number
         email: Contact email address
-        start_date: Rental start date (YYYY-MM-DD format)
-        end_date: Rental end date (YYYY-MM-DD format)
+        start_date: Rental start date (YYYY-MM-DD or a date)
+        end_date: Rental end date (YYYY-MM-DD or a date)
         qty: Number of packages being rented
         include_dj: Whether DJ service is included
-        total_price: Calculated total price for the booking
+        total_price_cents: Calculated total price for the booking, in cents
         client: Supabase client (optional)
         
     Returns:
-        Created booking dictionary
+        The created Booking
     """
     if client is None:
         client = get_supabase_client()
     
-    booking_data = {
-        "package_id": package_id,
-        "customer_name": customer_name,
-        "phone": phone,
-        "email": email,
-        "start_date": start_date,
-        "end_date": end_date,
-        "qty": qty,
-        "include_dj": include_dj,
-        "total_price": total_price,
-        "status": "pending"
-    }
+    row = _booking_row(
+        package_id, customer_name, phone, email, start_date,
+        end_date, qty, include_dj, total_price_cents
+    )
     
-    response = client.table("bookings").insert(booking_data).execute()
-    return response.data[0]
+    return _insert_bookings([row], client)[0]
 
 
-def list_bookings(client: Optional[Client] = None) -> List[Dict[str, Any]]:
+def create_bookings_bulk(items: List[BookingInput], client: Optional[Client] = None) -> List[Booking]:
     """
-    Retrieve all bookings with package information.
+    Create several bookings in one go.
+    
+    All rows are sent in a single insert request, so a multi-package cart
+    or an admin import costs one round-trip instead of one per booking.
     
-    This performs a JOIN to include package details with each booking.
+    Like create_booking(), this does NOT check availability.
     
     Args:
+        items: Bookings to create (same fields as create_booking's arguments)
         client: Supabase client (optional)
         
     Returns:
-        List of bookings with nested package information
+        Created Bookings, in the same order as items
     """
+    if not items:
+        return []
+    
     if client is None:
         client = get_supabase_client()
     
-    response = (
-        client.table("bookings")
-        .select("*, packages(name)")
-        .order("created_at", desc=True)
-        .execute()
-    )
+    rows = [_booking_row(*_BOOKING_INPUT_VALUES(item)) for item in items]
     
-    return response.data
+    return _insert_bookings(rows, client)
 
 
-def get_bookings_for_package(
+def create_booking_checked(
     package_id: int,
-    start_date: str,
-    end_date: str,
+    customer_name: str,
+    phone: str,
+    email: str,
+    start_date: DateLike,
+    end_date: DateLike,
+    qty: int,
+    include_dj: bool,
+    total_price_cents: int,
     client: Optional[Client] = None
-) -> List[Dict[str, Any]]:
+) -> Booking:
+    """
+    Create a booking only if the package is still available.
+    
+    Same arguments as create_booking(), but the availability check and the
+    insert both happen inside the book_if_available() database function -
+    one round-trip, and nobody can grab the stock in between.
+    
+    Args:
+        package_id: ID of package being rented
+        customer_name: Customer's full name
+        phone: Contact phone number
+        email: Contact email address
+        start_date: Rental start date (YYYY-MM-DD or a date)
+        end_date: Rental end date (YYYY-MM-DD or a date)
+        qty: Number of packages being rented
+        include_dj: Whether DJ service is included
+        total_price_cents: Calculated total price for the booking, in cents
+        client: Supabase client (optional)
+        
+    Returns:
+        The created Booking
+        
+    Raises:
+        postgrest.exceptions.APIError: If the package doesn't exist or
+            there isn't enough stock left for these dates
+    """
+    if client is None:
+        client = get_supabase_client()
+    
+    response = client.rpc("book_if_available", {
+        "p_package_id": package_id,
+        "p_start": str(start_date),
+        "p_end": str(end_date),
+        "p_qty": qty,
+        "p_include_dj": include_dj,
+        "p_total_price": str(from_cents(total_price_cents)),
+        "p_name": customer_name,
+        "p_phone": phone,
+        "p_email": email
+    }).execute()
+    
+    _notify_change("bookings", [package_id])
+    
+    return Booking.from_row(response.data)
+
+
+def list_bookings(
+    limit: int = 50,
+    offset: int = 0,
+    status: Optional[str] = None,
+    since: Optional[str] = None,
+    fields: Optional[str] = None,
+    client: Optional[Client] = None
+) -> List[Booking]:
+    """
+    Retrieve one page of bookings with package information, newest first.
+    
+    Reads the bookings_with_package view, which joins on each booking's
+    package name. Only limit rows are fetched, so the cost stays the same
+    however many bookings pile up - use iter_bookings() to walk through
+    all of them.
+    
+    Args:
+        limit: Page size (how many bookings to return at most)
+        offset: How many bookings to skip (e.g. page * limit)
+        status: Only bookings with this status, e.g. 'pending' (optional)
+        since: Only bookings created on/after this date or timestamp (optional)
+        fields: Columns to select (optional, defaults to BOOKING_LIST_FIELDS)
+        client: Supabase client (optional)
+        
+    Returns:
+        List of Bookings, each with a package_name
+    """
+    if client is None:
+        client = get_supabase_client()
+    
+    response = _bookings_page_query(client, limit, offset, status, since, fields).execute()
+    
+    return [Booking.from_row(row) for row in response.data]
+
+
+async def alist_bookings(
+    limit: int = 50,
+    offset: int = 0,
+    status: Optional[str] = None,
+    since: Optional[str] = None,
+    fields: Optional[str] = None,
+    client: Optional[AsyncPostgrestClient] = None
+) -> List[Booking]:
+    """
+    Async version of list_bookings() - same arguments, same page.
+    
+    Args:
+        client: Async PostgREST client (optional, uses the shared one)
+    """
+    if client is None:
+        client = get_async_postgrest_client()
+    
+    response = await _bookings_page_query(client, limit, offset, status, since, fields).execute()
+    
+    return [Booking.from_row(row) for row in response.data]
+
+
+def _bookings_page_query(
+    client: Any,
+    limit: int,
+    offset: int,
+    status: Optional[str],
+    since: Optional[str],
+    fields: Optional[str]
+) -> Any:
+    """
+    Builds (but doesn't run) a list_bookings() page query.
+    
+    The sync and async clients share the same builder API, so both
+    list_bookings() and alist_bookings() use this.
+    """
+    query = client.table("bookings_with_package").select(fields or BOOKING_LIST_FIELDS)
+    
+    if status is not None:
+        query = query.eq("status", status)
+    if since is not None:
+        query = query.gte("created_at", str(since))
+    
+    return query.order("created_at", desc=True).range(offset, offset + limit - 1)
+
+
+def iter_bookings(
+    client: Optional[Client] = None,
+    page_size: int = 500,
+    fields: Optional[str] = None
+) -> Iterator[Booking]:
+    """
+    Yield every booking (with package name) one page at a time.
+    
+    Walks through every booking rather than one page like list_bookings(),
+    but never holds more than page_size rows in memory, and the first rows
+    are available as soon as the first page comes back - handy once the
+    bookings table gets big.
+    
+    Args:
+        client: Supabase client (optional)
+        page_size: How many rows to fetch per request
+        fields: Columns to select (optional, defaults to BOOKING_LIST_FIELDS)
+        
+    Yields:
+        Bookings, each with a package_name, newest first
+    """
+    if client is None:
+        client = get_supabase_client()
+    
+    columns = fields or BOOKING_LIST_FIELDS
+    
+    last_id = None
+    while True:
+        response = _bookings_keyset_query(client, columns, page_size, last_id).execute()
+        
+        yield from map(Booking.from_row, response.data)
+        
+        # A short page means we've reached the end
+        if len(response.data) < page_size:
+            return
+        
+        last_id = response.data[-1]["id"]
+
+
+async def aiter_bookings(
+    client: Optional[AsyncPostgrestClient] = None,
+    page_size: int = 500,
+    fields: Optional[str] = None
+) -> AsyncIterator[Booking]:
+    """
+    Async version of iter_bookings() - same arguments, use with `async for`.
+    
+    Same pages and order, but waiting on each page doesn't block the
+    event loop, so big exports can stream alongside other async work.
+    
+    Args:
+        client: Async PostgREST client (optional, uses the shared one)
+        page_size: How many rows to fetch per request
+        fields: Columns to select (optional, defaults to BOOKING_LIST_FIELDS)
+        
+    Yields:
+        Bookings, each with a package_name, newest first
+    """
+    if client is None:
+        client = get_async_postgrest_client()
+    
+    columns = fields or BOOKING_LIST_FIELDS
+    
+    last_id = None
+    while True:
+        response = await _bookings_keyset_query(client, columns, page_size, last_id).execute()
+        
+        for row in response.data:
+            yield Booking.from_row(row)
+        
+        # A short page means we've reached the end
+        if len(response.data) < page_size:
+            return
+        
+        last_id = response.data[-1]["id"]
+
+
+def _bookings_keyset_query(client: Any, columns: str, page_size: int, before_id: Optional[int]) -> Any:
+    """
+    Builds (but doesn't run) one iter_bookings() page, for either the sync
+    or the async client.
+    
+    Pages are keyset-based - "the next page_size ids below the last one we
+    saw" - rather than offsets, so bookings created mid-stream can't shift
+    later pages and make rows repeat.
+    """
+    query = client.table("bookings_with_package").select(columns)
+    
+    if before_id is not None:
+        query = query.lt("id", before_id)
+    
+    return query.order("id", desc=True).limit(page_size)  # Newest first
+
+
+def get_bookings_for_package(
+    package_id: int,
+    start_date: DateLike,
+    end_date: DateLike,
+    client: Optional[Client] = None,
+    fields: Optional[str] = None
+) -> List[Booking]:
     """
     Get all bookings that overlap with a given date range for a package.
     
@@ -333,52 +776,303 @@ def get_bookings_for_package(
     
     Args:
         package_id: Package to check
-        start_date: Start of date range to check (YYYY-MM-DD)
-        end_date: End of date range to check (YYYY-MM-DD)
+        start_date: Start of date range to check (YYYY-MM-DD or a date)
+        end_date: End of date range to check (YYYY-MM-DD or a date)
         client: Supabase client (optional)
+        fields: Columns to select (optional, defaults to BOOKING_OVERLAP_FIELDS;
+            pass "*" for whole rows)
         
     Returns:
-        List of overlapping bookings (excluding cancelled ones)
+        List of overlapping Bookings (excluding cancelled ones)
     """
     if client is None:
         client = get_supabase_client()
     
-    # Query for overlapping bookings
-    # A booking overlaps if: start_date <= their_end AND end_date >= their_start
-    response = (
+    response = _overlapping_query(client, package_id, start_date, end_date, fields).execute()
+    
+    return [Booking.from_row(row) for row in response.data]
+
+
+async def aget_bookings_for_package(
+    package_id: int,
+    start_date: DateLike,
+    end_date: DateLike,
+    client: Optional[AsyncPostgrestClient] = None,
+    fields: Optional[str] = None
+) -> List[Booking]:
+    """
+    Async version of get_bookings_for_package() - same arguments and results.
+    
+    Args:
+        client: Async PostgREST client (optional, uses the shared one)
+    """
+    if client is None:
+        client = get_async_postgrest_client()
+    
+    response = await _overlapping_query(client, package_id, start_date, end_date, fields).execute()
+    
+    return [Booking.from_row(row) for row in response.data]
+
+
+def _overlapping_query(
+    client: Any,
+    package_id: int,
+    start_date: DateLike,
+    end_date: DateLike,
+    fields: Optional[str]
+) -> Any:
+    """
+    Builds (but doesn't run) the get_bookings_for_package() query, for
+    either the sync or the async client.
+    """
+    # A booking overlaps if its rental_range shares a day with [start_date, end_date]
+    if fields is None or fields == BOOKING_OVERLAP_FIELDS:
+        # The usual case lives in the bookings_overlapping() Postgres function,
+        # which already returns just BOOKING_OVERLAP_FIELDS. (No select() on
+        # the RPC - older postgrest-py RPC builders don't have one.)
+        return client.rpc(
+            "bookings_overlapping",
+            {"p": package_id, "s": str(start_date), "e": str(end_date)}
+        )
+    
+    # Other columns: same filter straight on the table (still uses the GiST index)
+    return (
         client.table("bookings")
-        .select("*")
+        .select(fields)
         .eq("package_id", package_id)
-        .neq("status", "cancelled")  # Don't count cancelled bookings
-        .lte("start_date", end_date)  # Their start is before or on our end
-        .gte("end_date", start_date)  # Their end is after or on our start
+        .neq("status", "cancelled")
+        .filter("rental_range", "ov", f"[{start_date},{end_date}]")
+    )
+
+
+def get_bookings_for_packages(
+    package_ids: List[int],
+    start_date: DateLike,
+    end_date: DateLike,
+    client: Optional[Client] = None
+) -> Dict[int, List[Booking]]:
+    """
+    Get the overlapping bookings for several packages at once.
+    
+    Same overlap rule as get_bookings_for_package(), but one query for the
+    whole list instead of one call per package (e.g. checking a cart).
+    
+    Args:
+        package_ids: Packages to check
+        start_date: Start of date range to check (YYYY-MM-DD or a date)
+        end_date: End of date range to check (YYYY-MM-DD or a date)
+        client: Supabase client (optional)
+        
+    Returns:
+        Dict of package_id -> list of overlapping Bookings (id, package_id,
+        start_date, end_date, qty); packages with none are left out
+    """
+    if not package_ids:
+        return {}
+    
+    if client is None:
+        client = get_supabase_client()
+    
+    response = (
+        client.table("bookings")
+        .select("id,package_id,start_date,end_date,qty")
+        .in_("package_id", package_ids)
+        .neq("status", "cancelled")
+        .filter("rental_range", "ov", f"[{start_date},{end_date}]")  # Range overlap (&&) - uses the GiST index
+        .execute()
+    )
+    
+    by_package: Dict[int, List[Booking]] = defaultdict(list)
+    for booking in map(Booking.from_row, response.data):
+        by_package[booking.package_id].append(booking)
+    
+    return dict(by_package)
+
+
+def get_bookings_in_range(
+    start_date: DateLike,
+    end_date: DateLike,
+    client: Optional[Client] = None
+) -> List[Dict[str, Any]]:
+    """
+    Get every booking (for any package) that overlaps a date range.
+    
+    Same overlap rule as get_bookings_for_package(), but across all
+    packages in one query - used to build the availability calendar.
+    
+    Args:
+        start_date: Start of date range (YYYY-MM-DD or a date)
+        end_date: End of date range (YYYY-MM-DD or a date)
+        client: Supabase client (optional)
+        
+    Returns:
+        List of bookings with package_id, start_date, end_date, qty
+        (excluding cancelled ones)
+    """
+    if client is None:
+        client = get_supabase_client()
+    
+    response = (
+        client.table("bookings")
+        .select("package_id, start_date, end_date, qty")
+        .neq("status", "cancelled")
+        .filter("rental_range", "ov", f"[{start_date},{end_date}]")  # Range overlap (&&) - uses the GiST index
         .execute()
     )
     
     return response.data
 
 
+def get_available_qty(
+    package_id: int,
+    start_date: DateLike,
+    end_date: DateLike,
+    client: Optional[Client] = None
+) -> Optional[int]:
+    """
+    Get how many of a package are still free over a date range.
+    
+    Calls the available_qty() Postgres function, which does the stock
+    minus overlapping bookings math on the server and sends back a single
+    number - no booking rows cross the wire.
+    
+    Args:
+        package_id: Package to check
+        start_date: Start of date range to check (YYYY-MM-DD or a date)
+        end_date: End of date range to check (YYYY-MM-DD or a date)
+        client: Supabase client (optional)
+        
+    Returns:
+        Remaining quantity, or None if the package doesn't exist
+    """
+    if client is None:
+        client = get_supabase_client()
+    
+    response = client.rpc(
+        "available_qty",
+        {"p": package_id, "s": str(start_date), "e": str(end_date)}
+    ).execute()
+    
+    return response.data
+
+
+def booked_qty_by_package(
+    start_date: DateLike,
+    end_date: DateLike,
+    client: Optional[Client] = None
+) -> Dict[int, int]:
+    """
+    Get how many of each package are already booked over a date range.
+    
+    Calls the booked_qty_map() Postgres function, which sums overlapping
+    (non-cancelled) bookings grouped by package - one round-trip for all
+    packages instead of one get_bookings_for_package() call each.
+    
+    Args:
+        start_date: Start of date range to check (YYYY-MM-DD or a date)
+        end_date: End of date range to check (YYYY-MM-DD or a date)
+        client: Supabase client (optional)
+        
+    Returns:
+        Dict of package_id -> booked quantity (packages with no overlapping
+        bookings are left out)
+    """
+    if client is None:
+        client = get_supabase_client()
+    
+    response = client.rpc("booked_qty_map", {"s": str(start_date), "e": str(end_date)}).execute()
+    
+    return dict(map(itemgetter("package_id", "booked_qty"), response.data))
+
+
 # ============================================================================
 # SETTINGS OPERATIONS
 # ============================================================================
 
-def get_dj_rate(client: Optional[Client] = None) -> float:
+# The DJ rate almost never changes, so it's remembered for a while
+# instead of being fetched on every price calculation
+DJ_RATE_TTL = 300.0
+
+# (rate in cents, expires_at) - None until the first lookup
+_dj_rate_cache: Optional[Tuple[int, float]] = None
+
+
+def get_dj_rate_cents(client: Optional[Client] = None) -> int:
     """
-    Get the current DJ daily rate from settings.
+    Get the current DJ daily rate from settings, in cents.
+    
+    Only the first call (and the first one after DJ_RATE_TTL seconds)
+    actually queries the database - the rest reuse the cached value.
+    Call invalidate_dj_rate() after changing the rate.
     
     Args:
         client: Supabase client (optional)
         
     Returns:
-        DJ daily rate as a float
+        DJ daily rate in cents (e.g. 15000 for $150.00)
     """
+    rate = _cached_dj_rate()
+    if rate is not None:
+        return rate
+    
     if client is None:
         client = get_supabase_client()
     
     response = client.table("settings").select("dj_daily_rate").eq("id", 1).execute()
     
-    if response.data:
-        return float(response.data[0]["dj_daily_rate"])
+    return _store_dj_rate(response.data)
+
+
+async def aget_dj_rate_cents(client: Optional[AsyncPostgrestClient] = None) -> int:
+    """
+    Async version of get_dj_rate_cents() - shares the same cache.
+    
+    Args:
+        client: Async PostgREST client (optional, uses the shared one)
+        
+    Returns:
+        DJ daily rate in cents
+    """
+    rate = _cached_dj_rate()
+    if rate is not None:
+        return rate
     
-    # Default if not set (shouldn't happen with proper seed data)
-    return 150.00
\ No newline at end of file
+    if client is None:
+        client = get_async_postgrest_client()
+    
+    response = await client.table("settings").select("dj_daily_rate").eq("id", 1).execute()
+    
+    return _store_dj_rate(response.data)
+
+
+def _cached_dj_rate() -> Optional[int]:
+    """The cached DJ rate in cents, or None if there isn't a fresh one."""
+    if _dj_rate_cache is not None:
+        rate, expires_at = _dj_rate_cache
+        if time.monotonic() < expires_at:
+            return rate
+    
+    return None
+
+
+def _store_dj_rate(rows: List[Dict[str, Any]]) -> int:
+    """Turns the settings query result into cents and caches it."""
+    global _dj_rate_cache
+    
+    if rows:
+        rate = to_cents(rows[0]["dj_daily_rate"])
+    else:
+        # Default if not set (shouldn't happen with proper seed data)
+        rate = 15000
+    
+    _dj_rate_cache = (rate, time.monotonic() + DJ_RATE_TTL)
+    
+    return rate
+
+
+def invalidate_dj_rate() -> None:
+    """
+    Forgets the cached DJ rate so the next get_dj_rate_cents() re-reads it.
+    """
+    global _dj_rate_cache
+    _dj_rate_cache = None
\ No newline at end of file